@@ -0,0 +1,127 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        for num in range(12):
+            cls.post = Post.objects.create(
+                text=f'Пост {num}', author=cls.author, group=cls.group)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feeds(self):
+        '''Все ленты отдают JSON с курсорами'''
+        urls = [
+            reverse('api:index'),
+            reverse('api:group', args=[self.group.slug]),
+            reverse('api:profile', args=[self.author.username]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.guest_client.get(url).json()
+                self.assertEqual(len(data['results']), 10)
+                self.assertEqual(data['results'][0]['text'], 'Пост 11')
+                self.assertIsNone(data['previous'])
+                rest = self.guest_client.get(data['next']).json()
+                self.assertEqual(len(rest['results']), 2)
+        data = self.reader_client.get(reverse('api:follow_index')).json()
+        self.assertEqual(data['results'][0]['author'], 'author')
+        response = self.guest_client.get(reverse('api:follow_index'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_post_with_comments(self):
+        '''Пост отдаётся вместе с комментариями'''
+        Comment.objects.create(
+            text='Комментарий', author=self.reader, post=self.post)
+        url = reverse('api:post', args=[self.author.username, self.post.pk])
+        data = self.guest_client.get(url).json()
+        self.assertEqual(data['post']['comment_count'], 1)
+        self.assertEqual(data['results'][0]['author'], 'reader')
+
+    def test_conditional_get(self):
+        '''Неизменившаяся лента отвечает 304, новый комментарий её меняет'''
+        url = reverse('api:post', args=[self.author.username, self.post.pk])
+        response = self.guest_client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(
+            text='Новый', author=self.reader, post=self.post)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_last_modified_follows_edits(self):
+        '''Правка и удаление поста меняют Last-Modified ленты'''
+        url = reverse('api:index')
+        since = self.guest_client.get(url)['Last-Modified']
+        response = self.guest_client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 304)
+        later = time.time() + 2
+        with mock.patch('posts.cache.time.time', return_value=later):
+            Post.objects.filter(pk=self.post.pk).get().delete()
+        response = self.guest_client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(self.post.pk, [
+            row['id'] for row in response.json()['results']])
+
+    def test_page_stamps(self):
+        '''Подписка и правки комментария, группы и имени меняют ETag страниц'''
+        comment = Comment.objects.create(
+            text='Комментарий', author=self.reader, post=self.post)
+        writer = User.objects.create(username='writer')
+
+        def follow():
+            Follow.objects.create(user=writer, author=self.author)
+
+        def edit_comment():
+            comment.text = 'Исправленный'
+            comment.save()
+
+        def rename():
+            writer.first_name = 'Лев'
+            writer.save()
+
+        def edit_group():
+            self.group.description = 'Новое описание'
+            self.group.save()
+
+        cases = [
+            (reverse('api:profile', args=[self.author.username]), follow),
+            (reverse('api:post', args=[self.author.username, self.post.pk]),
+             edit_comment),
+            (reverse('api:group', args=[self.group.slug]), edit_group),
+            (reverse('api:profile', args=[writer.username]), rename),
+        ]
+        for url, change in cases:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                change()
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
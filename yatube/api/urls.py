@@ -0,0 +1,13 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.index, name='index'),
+    path('group/<slug:slug>/', views.group_posts, name='group'),
+    path('follow/', views.follow_index, name='follow_index'),
+    path('<str:username>/', views.profile, name='profile'),
+    path('<str:username>/<int:post_id>/', views.post_view, name='post'),
+]
@@ -0,0 +1,208 @@
+"""
+JSON-версии лент для мобильных клиентов.
+
+Записи читаются через values() без создания моделей и листаются по
+курсорам, как HTML-страницы. ETag зависит от штампов страницы и адреса
+запроса, Last-Modified — от времени тех же штампов, поэтому правка или
+удаление меняют оба заголовка, а неизменившаяся лента отвечает 304 без
+выборки страницы.
+"""
+import hashlib
+import math
+from datetime import datetime, timezone
+
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max
+from django.http import JsonResponse
+from django.views.decorators.http import condition, require_safe
+
+from posts import timeline
+from posts.cache import AUTHOR, FEED, GROUP, POST, get_stamp
+from posts.models import AuthorStats, Comment, Follow, Group, Post, User
+from posts.paginators import FEED_ORDERING, CursorPaginator
+from yatube.settings import PAGE_SIZE
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'author__username', 'group__slug',
+    'comment_count', 'image',
+)
+COMMENT_FIELDS = ('id', 'text', 'created', 'author__username')
+COMMENT_ORDERING = ('created', 'id')
+
+
+def serialize_post(row):
+    return {
+        'id': row['id'],
+        'author': row['author__username'],
+        'group': row['group__slug'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'comment_count': row['comment_count'],
+        'image': default_storage.url(row['image']) if row['image'] else None,
+    }
+
+
+def serialize_comment(row):
+    return {
+        'id': row['id'],
+        'author': row['author__username'],
+        'text': row['text'],
+        'created': row['created'],
+    }
+
+
+def json_response(payload, status=200):
+    return JsonResponse(
+        payload, status=status, json_dumps_params={'ensure_ascii': False})
+
+
+def not_found():
+    return json_response({'detail': 'Не найдено'}, status=404)
+
+
+def cursor_page(request, object_list, ordering=FEED_ORDERING):
+    paginator = CursorPaginator(object_list, PAGE_SIZE, ordering)
+    return paginator.cursor_page(
+        request.GET.get('after'), request.GET.get('before'))
+
+
+def page_payload(request, page, serialize):
+    def link(name, cursor):
+        return f'{request.path}?{name}={cursor}' if cursor else None
+
+    return {
+        'results': [serialize(row) for row in page.object_list],
+        'next': link('after', page.paginator.next_cursor),
+        'previous': link('before', page.paginator.previous_cursor),
+    }
+
+
+def follow_state(request):
+    """Подписки читателя: его лента меняется и при их изменении."""
+    if not request.user.is_authenticated:
+        return None
+    state = Follow.objects.filter(user=request.user).aggregate(
+        total=Count('id'), last=Max('id'))
+    return f'{request.user.pk}:{state["total"]}:{state["last"]}'
+
+
+def page_stamps(slug=None, username=None, post_id=None):
+    """Штампы ответа — те же, что сбрасывают HTML-страницы."""
+    if post_id is not None:
+        return [(POST, post_id)]
+    if username is not None:
+        # Подписки и правка имени трогают штамп автора.
+        return [(AUTHOR, username)]
+    if slug is not None:
+        return [(GROUP, slug)]
+    return [(FEED,)]
+
+
+def stamps_etag(request, *stamps):
+    values = ':'.join(str(get_stamp(*parts)) for parts in stamps)
+    key = f'{values}:{request.get_full_path()}'
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def etag(request, *args, **kwargs):
+    return stamps_etag(request, *page_stamps(**kwargs))
+
+
+def follow_etag(request):
+    state = follow_state(request)
+    if state is None:
+        return None
+    key = f'{stamps_etag(request, (FEED,))}:{state}'
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def stamp_modified(*stamps):
+    # Штамп — дробное время, а Last-Modified точен до секунды.
+    value = max(get_stamp(*parts) for parts in stamps)
+    return datetime.fromtimestamp(math.ceil(value), tz=timezone.utc)
+
+
+def modified(request, *args, **kwargs):
+    return stamp_modified(*page_stamps(**kwargs))
+
+
+def follow_modified(request):
+    if not request.user.is_authenticated:
+        return None
+    # Подписка и отписка трогают штамп автора у обоих пользователей.
+    return stamp_modified((FEED,), (AUTHOR, request.user.username))
+
+
+@require_safe
+@condition(etag_func=etag, last_modified_func=modified)
+def index(request):
+    page = cursor_page(request, Post.objects.values(*POST_FIELDS))
+    return json_response(page_payload(request, page, serialize_post))
+
+
+@require_safe
+@condition(etag_func=etag, last_modified_func=modified)
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).values(
+        'id', 'slug', 'title', 'description').first()
+    if group is None:
+        return not_found()
+    page = cursor_page(
+        request, Post.objects.filter(group_id=group.pop('id'))
+        .values(*POST_FIELDS))
+    payload = page_payload(request, page, serialize_post)
+    payload['group'] = group
+    return json_response(payload)
+
+
+@require_safe
+@condition(etag_func=etag, last_modified_func=modified)
+def profile(request, username):
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        return not_found()
+    stats = AuthorStats.for_user(author)
+    page = cursor_page(
+        request, Post.objects.filter(author=author).values(*POST_FIELDS))
+    payload = page_payload(request, page, serialize_post)
+    payload['author'] = {
+        'username': author.username,
+        'full_name': author.get_full_name(),
+        'followers': stats.followers,
+        'following': stats.following,
+        'posts': stats.posts,
+    }
+    return json_response(payload)
+
+
+@require_safe
+@condition(etag_func=etag, last_modified_func=modified)
+def post_view(request, username, post_id):
+    post = Post.objects.filter(
+        pk=post_id, author__username=username).values(*POST_FIELDS).first()
+    if post is None:
+        return not_found()
+    page = cursor_page(
+        request,
+        Comment.objects.filter(post_id=post_id)
+        .values(*COMMENT_FIELDS),
+        COMMENT_ORDERING)
+    payload = page_payload(request, page, serialize_comment)
+    payload['post'] = serialize_post(post)
+    return json_response(payload)
+
+
+@require_safe
+@condition(etag_func=follow_etag, last_modified_func=follow_modified)
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return json_response({'detail': 'Требуется вход'}, status=401)
+    page = cursor_page(
+        request, timeline.sources(request.user), timeline.TIMELINE_ORDERING)
+    ids = [row['post_id'] for row in page.object_list]
+    rows = {
+        row['id']: row
+        for row in Post.objects.filter(pk__in=ids).values(*POST_FIELDS)
+    }
+    page.object_list = [rows[pk] for pk in ids if pk in rows]
+    return json_response(page_payload(request, page, serialize_post))
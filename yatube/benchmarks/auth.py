@@ -0,0 +1,75 @@
+"""
+Стоимость сессии и пользователя на запросах вошедшего.
+
+Один и тот же читатель открывает страницы при каждом профиле из
+AUTH_PROFILES. Считаются задержка и запросы к django_session и
+auth_user; с save_every_request сессия сохраняется на каждом
+запросе, как при SESSION_SAVE_EVERY_REQUEST.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, User
+from users import sessions
+
+from .runner import percentile
+
+AUTH_TABLES = ('FROM "django_session"', 'UPDATE "django_session"',
+               'FROM "auth_user"')
+PAGES = ('index', 'follow_index')
+
+
+def auth_queries(captured):
+    return sum(
+        any(table in query['sql'] for table in AUTH_TABLES)
+        for query in captured.captured_queries
+    )
+
+
+def measure(user, page, requests, warmup):
+    client = Client()
+    client.force_login(user)
+    url = reverse(page)
+    for _ in range(warmup):
+        client.get(url)
+    latencies, queries, statuses = [], [], set()
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = client.get(url)
+            latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(auth_queries(captured))
+        statuses.add(response.status_code)
+    return {
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'auth_queries_mean': round(sum(queries) / len(queries), 2),
+        'statuses': sorted(statuses),
+    }
+
+
+def run(profiles, requests=200, warmup=10, save_every_request=False):
+    reader = (
+        Follow.objects.values_list('user_id', flat=True).first()
+        or User.objects.values_list('pk', flat=True).first())
+    if reader is None:
+        raise ValueError('для замера нужен хотя бы один пользователь')
+    user = User.objects.get(pk=reader)
+    results = {}
+    for profile in profiles:
+        with override_settings(
+                SESSION_SAVE_EVERY_REQUEST=save_every_request,
+                **settings.AUTH_PROFILES[profile]):
+            cache.clear()
+            results[profile] = {
+                page: measure(user, page, requests, warmup)
+                for page in PAGES
+            }
+            sessions.flush_pending()
+    return results
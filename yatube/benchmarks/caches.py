@@ -0,0 +1,84 @@
+"""
+Сравнение бэкендов кеша: LocMem, FileBased и общий SQLiteCache.
+
+Замеряются задержки set, get (попадание и промах) и incr в одном
+процессе, а также доля попаданий в процессах, которые читают ключи,
+записанные родителем: так видно, делится ли кеш между воркерами.
+"""
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from yatube.sharedcache import SQLiteCache
+
+from .runner import percentile
+
+PAGE = b'x' * 20000
+
+
+def backends(directory):
+    params = {'OPTIONS': {'MAX_ENTRIES': 100000}}
+    return {
+        'locmem': LocMemCache('bench', params),
+        'filebased': FileBasedCache(
+            os.path.join(directory, 'files'), params),
+        'sqlite': SQLiteCache(
+            os.path.join(directory, 'cache.sqlite3'), params),
+    }
+
+
+def timed(operation, keys):
+    latencies = []
+    for key in keys:
+        start = time.perf_counter()
+        operation(key)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return {
+        'p50_us': round(percentile(latencies, 0.50), 1),
+        'p99_us': round(percentile(latencies, 0.99), 1),
+        'ops_per_sec': round(len(keys) / (sum(latencies) / 1e6)),
+    }
+
+
+_shared = None
+
+
+def read_shared(keys):
+    return sum(_shared.get(key) is not None for key in keys)
+
+
+def shared_hit_rate(cache, keys, processes):
+    """Доля попаданий у воркеров, запущенных до записи ключей."""
+    global _shared
+    _shared = cache
+    # Воркеры получают бэкенд через fork, как воркеры gunicorn.
+    context = multiprocessing.get_context('fork')
+    with context.Pool(processes) as pool:
+        keys = [f'shared:{key}' for key in keys]
+        for key in keys:
+            cache.set(key, PAGE)
+        hits = pool.map(read_shared, [keys] * processes)
+    return round(sum(hits) / (len(keys) * processes), 3)
+
+
+def run(operations=2000, processes=4):
+    keys = [f'key{number}' for number in range(operations)]
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, cache in backends(directory).items():
+            cache.clear()
+            result = {
+                'set': timed(lambda key: cache.set(key, PAGE), keys),
+                'get_hit': timed(cache.get, keys),
+                'get_miss': timed(lambda key: cache.get(f'miss:{key}'), keys),
+            }
+            cache.set('counter', 0)
+            result['incr'] = timed(lambda key: cache.incr('counter'), keys)
+            result['shared_hit_rate'] = shared_hit_rate(
+                cache, keys, processes)
+            results[name] = result
+    return results
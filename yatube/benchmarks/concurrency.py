@@ -0,0 +1,100 @@
+"""
+Пропускная способность чтения при одновременной записи.
+
+Читатели в потоках выбирают первую страницу ленты и комментарии
+случайного поста, писатели добавляют комментарии. После каждой
+итерации вызывается close_old_connections(), как на границе
+HTTP-запроса, поэтому CONN_MAX_AGE профиля влияет на результат.
+"""
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, connections
+
+from posts.models import Comment, Post, User
+from yatube.settings import PAGE_SIZE
+
+from .runner import percentile
+
+MARKER = 'bench-concurrency'
+PROFILE_KEYS = ('PRAGMAS', 'TRANSACTION_MODE', 'CONN_MAX_AGE')
+
+
+def apply_profile(name, alias='default'):
+    """Подменяет настройки соединения; новые соединения возьмут их."""
+    settings_dict = connections.databases[alias]
+    for key in PROFILE_KEYS:
+        settings_dict.pop(key, None)
+    settings_dict.update(settings.SQLITE_PROFILES[name])
+    settings_dict.setdefault('CONN_MAX_AGE', 0)
+    connections[alias].close()
+
+
+def worker(step, stop, latencies, errors):
+    try:
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                step()
+            except OperationalError:
+                errors.append(time.perf_counter() - start)
+            else:
+                latencies.append(time.perf_counter() - start)
+            finally:
+                close_old_connections()
+    finally:
+        connections.close_all()
+
+
+def run(duration, readers, writers, seed=0):
+    rng = random.Random(seed)
+    post_ids = list(Post.objects.values_list('pk', flat=True)[:1000])
+    user_ids = list(User.objects.values_list('pk', flat=True)[:1000])
+    if not post_ids or not user_ids:
+        raise ValueError('для замера нужны посты и пользователи')
+    connections.close_all()
+
+    def read():
+        list(Post.objects.select_related('author', 'group')[:PAGE_SIZE])
+        list(Comment.objects.filter(post_id=rng.choice(post_ids))
+             .select_related('author')[:PAGE_SIZE])
+
+    def write():
+        Comment.objects.create(
+            post_id=rng.choice(post_ids), author_id=rng.choice(user_ids),
+            text=MARKER)
+
+    stop = threading.Event()
+    reads, read_errors, writes, write_errors = [], [], [], []
+    threads = [
+        threading.Thread(target=worker, args=(read, stop, reads, read_errors))
+        for _ in range(readers)
+    ] + [
+        threading.Thread(
+            target=worker, args=(write, stop, writes, write_errors))
+        for _ in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    Comment.objects.filter(text=MARKER).delete()
+
+    def ms(values, fraction):
+        if not values:
+            return None
+        return round(percentile(values, fraction) * 1000, 3)
+
+    return {
+        'reads_per_sec': round(len(reads) / duration, 1),
+        'read_p50_ms': ms(reads, 0.50),
+        'read_p95_ms': ms(reads, 0.95),
+        'read_errors': len(read_errors),
+        'writes_per_sec': round(len(writes) / duration, 1),
+        'write_p95_ms': ms(writes, 0.95),
+        'write_errors': len(write_errors),
+    }
@@ -0,0 +1,135 @@
+"""
+Генерация синтетического набора данных для нагрузочных замеров.
+
+Записи создаются через bulk_create пачками с заранее выделенными
+первичными ключами (см. posts.bulk). Подписки и комментарии распределены по
+степенному закону: немногие популярные авторы собирают большую часть
+подписчиков, как на живом сайте.
+"""
+import itertools
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from posts.bulk import chunks, explicit_dates, reserve_ids
+from posts.models import Comment, Follow, Group, Post, User
+
+USERNAME_PREFIX = 'bench'
+WORDS = (
+    'лев толстой пишет роман война мир дождь утро город поезд книга '
+    'письмо окно сад море дорога память свет тень разговор вечер'
+).split()
+
+
+def power_law_weights(count, exponent):
+    """Накопленные веса Ципфа для rng.choices(cum_weights=...)."""
+    return list(itertools.accumulate(
+        1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+class DatasetBuilder:
+    def __init__(self, users, groups, posts, comments, follows,
+                 exponent=1.1, days=365, batch_size=5000, seed=0,
+                 log=None):
+        self.users = users
+        self.groups = groups
+        self.posts = posts
+        self.comments = comments
+        self.follows = follows
+        self.exponent = exponent
+        self.days = days
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+
+    def text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words))
+
+    def moment(self):
+        return self.now - timedelta(seconds=self.rng.random() * self.days
+                                    * 24 * 3600)
+
+    def write(self, model, objects):
+        created = 0
+        for chunk in chunks(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk)
+            created += len(chunk)
+        self.log(f'{model.__name__}: {created}')
+
+    def build(self):
+        user_ids = self.build_users()
+        group_ids = self.build_groups()
+        post_ids = self.build_posts(user_ids, group_ids)
+        self.build_comments(user_ids, post_ids)
+        self.build_follows(user_ids)
+
+    def build_users(self):
+        first = reserve_ids(User, self.users)
+        ids = range(first, first + self.users)
+        self.write(User, (
+            User(id=pk, username=f'{USERNAME_PREFIX}{pk}', password='!')
+            for pk in ids
+        ))
+        return ids
+
+    def build_groups(self):
+        first = reserve_ids(Group, self.groups)
+        ids = range(first, first + self.groups)
+        self.write(Group, (
+            Group(id=pk, title=f'Группа {pk}',
+                  slug=f'{USERNAME_PREFIX}-group-{pk}',
+                  description=self.text(12))
+            for pk in ids
+        ))
+        return ids
+
+    def build_posts(self, user_ids, group_ids):
+        first = reserve_ids(Post, self.posts)
+        ids = range(first, first + self.posts)
+        weights = power_law_weights(len(user_ids), self.exponent)
+        authors = self.rng.choices(user_ids, cum_weights=weights,
+                                   k=self.posts)
+        group_choices = list(group_ids) + [None]
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            self.write(Post, (
+                Post(id=pk, author_id=author, text=self.text(30),
+                     group_id=self.rng.choice(group_choices),
+                     pub_date=self.moment())
+                for pk, author in zip(ids, authors)
+            ))
+        return ids
+
+    def build_comments(self, user_ids, post_ids):
+        if not post_ids:
+            return
+        weights = power_law_weights(len(post_ids), self.exponent)
+        # Популярность постов не должна совпадать с порядком их id.
+        ranked = list(post_ids)
+        self.rng.shuffle(ranked)
+        with explicit_dates(Comment._meta.get_field('created')):
+            self.write(Comment, (
+                Comment(
+                    post_id=self.rng.choices(ranked, cum_weights=weights)[0],
+                    author_id=self.rng.choice(user_ids),
+                    text=self.text(10), created=self.moment())
+                for _ in range(self.comments)
+            ))
+
+    def build_follows(self, user_ids):
+        weights = power_law_weights(len(user_ids), self.exponent)
+
+        def pairs():
+            for user in user_ids:
+                count = min(len(user_ids) - 1, int(
+                    self.rng.paretovariate(self.exponent) * self.follows))
+                authors = set(self.rng.choices(
+                    user_ids, cum_weights=weights, k=count))
+                authors.discard(user)
+                for author in authors:
+                    yield Follow(user_id=user, author_id=author)
+
+        self.write(Follow, pairs())
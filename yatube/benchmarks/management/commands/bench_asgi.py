@@ -0,0 +1,31 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import servers
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность WSGI и ASGI при множестве '
+            'одновременных соединений.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--wsgi-threads', type=int, default=4)
+        parser.add_argument(
+            '--asgi-threads', type=int, default=settings.ASGI_THREADS)
+        parser.add_argument(
+            '--only', nargs='+', metavar='VIEW',
+            help='Запрашивать только указанные страницы.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('Нужен хотя бы один запрос и одно соединение.')
+        result = servers.run(
+            options['requests'], options['concurrency'],
+            options['wsgi_threads'], options['asgi_threads'],
+            options['only'], options['seed'])
+        self.stdout.write(json.dumps(result, indent=2))
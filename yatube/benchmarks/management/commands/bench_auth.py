@@ -0,0 +1,30 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import auth
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает запросы вошедшего пользователя при профилях '
+            'сессий из AUTH_PROFILES.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profiles', nargs='+', default=list(settings.AUTH_PROFILES),
+            choices=list(settings.AUTH_PROFILES))
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument(
+            '--save-every-request', action='store_true',
+            help='Сохранять сессию на каждом запросе.')
+
+    def handle(self, *args, **options):
+        try:
+            results = auth.run(
+                options['profiles'], options['requests'], options['warmup'],
+                options['save_every_request'])
+        except ValueError as error:
+            raise CommandError(str(error))
+        self.stdout.write(json.dumps(results, indent=2))
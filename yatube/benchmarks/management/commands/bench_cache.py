@@ -0,0 +1,18 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from benchmarks import caches
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает LocMemCache, FileBasedCache и общий SQLiteCache: '
+            'задержки операций и попадания из других процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operations', type=int, default=2000)
+        parser.add_argument('--processes', type=int, default=4)
+
+    def handle(self, *args, **options):
+        results = caches.run(options['operations'], options['processes'])
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,38 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks import concurrency
+
+
+class Command(BaseCommand):
+    help = ('Замеряет чтение при одновременной записи для профилей '
+            'SQLite из SQLITE_PROFILES.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profiles', nargs='+', default=list(settings.SQLITE_PROFILES),
+            choices=list(settings.SQLITE_PROFILES))
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=1)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+            raise CommandError('Нужна файловая база SQLite.')
+        results = {}
+        try:
+            for profile in options['profiles']:
+                concurrency.apply_profile(profile)
+                try:
+                    results[profile] = concurrency.run(
+                        options['duration'], options['readers'],
+                        options['writers'], options['seed'])
+                except ValueError as error:
+                    raise CommandError(str(error))
+        finally:
+            concurrency.apply_profile(settings.DB_PROFILE)
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,86 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import runner
+from posts.models import Comment, Follow, Group, Post, User
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Замеряет p50/p95/p99, число запросов и пик памяти для '
+            'основных страниц и выводит результат в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument(
+            '--sample', type=int, default=100,
+            help='Сколько случайных групп, авторов и постов обходить.')
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--only', nargs='+', metavar='VIEW',
+            help='Замерить только указанные страницы.')
+        parser.add_argument(
+            '--output', help='Записать результат в файл вместо stdout.')
+        parser.add_argument(
+            '--compare', metavar='FILE',
+            help='Сравнить с результатом прошлого прогона.')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Не удалось прочитать {error}')
+        results = runner.run(
+            requests=options['requests'],
+            warmup=options['warmup'],
+            sample=options['sample'],
+            cold=options['cold'],
+            seed=options['seed'],
+            only=options['only'],
+        )
+        report = {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'cold': options['cold'],
+            'dataset': {
+                'users': User.objects.count(),
+                'groups': Group.objects.count(),
+                'posts': Post.objects.count(),
+                'comments': Comment.objects.count(),
+                'follows': Follow.objects.count(),
+            },
+            'views': results,
+        }
+        if baseline is not None:
+            report['compare'] = {
+                'revision': baseline.get('revision'),
+                'delta_percent': runner.compare(
+                    results, baseline.get('views', {})),
+            }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,43 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from benchmarks.dataset import DatasetBuilder
+from posts.bulk import DERIVED_COMMANDS
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу синтетическими данными для нагрузочных замеров.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--groups', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=5_000_000)
+        parser.add_argument('--comments', type=int, default=20_000_000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Минимум подписок у пользователя, сверху — хвост Парето.')
+        parser.add_argument(
+            '--exponent', type=float, default=1.1,
+            help='Показатель степенного закона для авторов и подписок.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Не пересчитывать счётчики, ленты и поисковый индекс.')
+
+    def handle(self, *args, **options):
+        DatasetBuilder(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            exponent=options['exponent'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        ).build()
+        if options['skip_derived']:
+            return
+        for command in DERIVED_COMMANDS:
+            call_command(command, stdout=self.stdout)
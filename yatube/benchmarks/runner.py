@@ -0,0 +1,141 @@
+"""
+Прогон страниц через тестовый клиент с замером задержки, числа
+запросов и пикового потребления памяти.
+"""
+import math
+import random
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Min
+from django.test import Client
+from django.urls import reverse
+
+from posts.concurrent import wrap_queries
+from posts.models import Follow, Group, Post, User
+from yatube.middleware import QueryRecorder
+
+
+def percentile(values, fraction):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def pick_targets(rng, sample):
+    """Случайные группы и посты с их авторами плюс самый активный читатель.
+
+    Посты выбираются по случайным id из диапазона, а не ORDER BY RANDOM(),
+    чтобы подготовка не сканировала таблицу на миллионы строк.
+    """
+    bounds = Post.objects.aggregate(first=Min('pk'), last=Max('pk'))
+    posts = []
+    if bounds['first'] is not None:
+        ids = {rng.randint(bounds['first'], bounds['last'])
+               for _ in range(sample)}
+        posts = list(Post.objects.filter(pk__in=ids).values_list(
+            'author__username', 'pk'))
+    groups = list(Group.objects.order_by('?').values_list(
+        'slug', flat=True)[:sample])
+    reader = (
+        Follow.objects.values('user_id').annotate(total=Count('id'))
+        .order_by('-total').values_list('user_id', flat=True).first()
+    )
+    return {
+        'groups': groups,
+        'authors': sorted({username for username, _ in posts}),
+        'posts': posts,
+        'reader': reader,
+    }
+
+
+def scenarios(targets, rng):
+    """Возвращает (имя, функция, выдающая URL, нужен ли вход)."""
+    def post_url():
+        username, pk = rng.choice(targets['posts'])
+        return reverse('post', kwargs={'username': username, 'post_id': pk})
+
+    return [
+        ('index', lambda: reverse('index'), False),
+        ('group_posts', lambda: reverse(
+            'group', args=[rng.choice(targets['groups'])]), False),
+        ('profile', lambda: reverse(
+            'profile', args=[rng.choice(targets['authors'])]), False),
+        ('post_view', post_url, False),
+        ('follow_index', lambda: reverse('follow_index'), True),
+    ]
+
+
+def measure(client, url_factory, requests, warmup, cold):
+    for _ in range(warmup):
+        client.get(url_factory())
+    latencies, queries, statuses = [], [], set()
+    tracemalloc.start()
+    try:
+        for _ in range(requests):
+            url = url_factory()
+            if cold:
+                cache.clear()
+            # Как и middleware, считает запросы из потоков gather.
+            recorder = QueryRecorder()
+            with wrap_queries(recorder):
+                start = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - start) * 1000)
+            queries.append(recorder.count)
+            statuses.add(response.status_code)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'requests': requests,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'queries_mean': round(sum(queries) / len(queries), 2),
+        'queries_max': max(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'statuses': sorted(statuses),
+    }
+
+
+def run(requests=200, warmup=10, sample=100, cold=False, seed=0,
+        only=None):
+    rng = random.Random(seed)
+    targets = pick_targets(rng, sample)
+    client = Client()
+    reader_client = Client()
+    if targets['reader'] is not None:
+        reader_client.force_login(User.objects.get(pk=targets['reader']))
+    results = {}
+    for name, url_factory, login in scenarios(targets, rng):
+        if only and name not in only:
+            continue
+        if name == 'group_posts' and not targets['groups']:
+            continue
+        if name in ('profile', 'post_view') and not targets['posts']:
+            continue
+        if login and targets['reader'] is None:
+            continue
+        results[name] = measure(
+            reader_client if login else client,
+            url_factory, requests, warmup, cold)
+    return results
+
+
+def compare(current, baseline):
+    """Относительное изменение метрик к прошлому прогону, в процентах."""
+    deltas = {}
+    for name, metrics in current.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        deltas[name] = {
+            key: round((value - previous[key]) / previous[key] * 100, 1)
+            for key, value in metrics.items()
+            if isinstance(value, (int, float)) and previous.get(key)
+        }
+    return deltas
@@ -0,0 +1,158 @@
+"""
+Пропускная способность WSGI и ASGI при множестве одновременных
+соединений.
+
+Сервер не поднимается: приложения вызываются в процессе, а клиенты
+моделируются так, как их обслуживают серверы. WSGI — фиксированный
+пул потоков, как у gunicorn с gthread: соединение ждёт свободный
+поток. ASGI — цикл событий с отдельной корутиной на каждое
+соединение и пулом потоков ASGI-обёртки.
+"""
+import asyncio
+import io
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+
+from posts.models import User
+from yatube.asgi_handler import WsgiToAsgi, build_environ
+
+from .runner import percentile, pick_targets, scenarios
+
+
+def make_scope(path, cookie):
+    headers = [(b'host', b'testserver')]
+    if cookie:
+        headers.append((b'cookie', cookie.encode()))
+    return {
+        'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'',
+        'headers': headers, 'server': ('testserver', 80),
+    }
+
+
+def plan(requests, only, seed):
+    """Список (путь, cookie) для всех запросов замера."""
+    rng = random.Random(seed)
+    targets = pick_targets(rng, 100)
+    cookie = ''
+    if targets['reader'] is not None:
+        client = Client()
+        client.force_login(User.objects.get(pk=targets['reader']))
+        cookie = '; '.join(
+            f'{name}={morsel.value}'
+            for name, morsel in client.cookies.items())
+    factories = [
+        (url_factory, login)
+        for name, url_factory, login in scenarios(targets, rng)
+        if (not only or name in only) and (cookie or not login)
+    ]
+    result = []
+    for _ in range(requests):
+        url_factory, login = rng.choice(factories)
+        result.append((url_factory(), cookie if login else ''))
+    return result
+
+
+def summary(latencies, statuses, elapsed):
+    return {
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'errors': sum(status != 200 for status in statuses),
+    }
+
+
+def run_wsgi(application, requests, concurrency, threads):
+    latencies, statuses = [], []
+
+    def handle(item, start):
+        path, cookie = item
+        status = {}
+
+        def start_response(line, headers, exc_info=None):
+            status['code'] = int(line.split(' ', 1)[0])
+
+        result = application(
+            build_environ(make_scope(path, cookie), io.BytesIO()),
+            start_response)
+        try:
+            b''.join(result)
+        finally:
+            result.close()
+        return time.perf_counter() - start, status['code']
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as workers:
+        # Очередь соединений к пулу потоков: больше concurrency запросов
+        # одновременно не бывает, лишние ждут свободного потока.
+        semaphore = threading.Semaphore(concurrency)
+
+        def submit(item):
+            semaphore.acquire()
+            # Задержка считается с момента отправки запроса, включая
+            # ожидание свободного потока, как и у ASGI.
+            future = workers.submit(handle, item, time.perf_counter())
+            future.add_done_callback(lambda _: semaphore.release())
+            return future
+
+        futures = [submit(item) for item in requests]
+        for future in futures:
+            latency, status = future.result()
+            latencies.append(latency)
+            statuses.append(status)
+    return summary(latencies, statuses, time.perf_counter() - started)
+
+
+def run_asgi(application, requests, concurrency):
+    latencies, statuses = [], []
+
+    async def request(path, cookie):
+        status = {}
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+
+        start = time.perf_counter()
+        await application(make_scope(path, cookie), receive, send)
+        latencies.append(time.perf_counter() - start)
+        statuses.append(status['code'])
+
+    async def connection(queue):
+        while not queue.empty():
+            await request(*queue.get_nowait())
+
+    async def main():
+        queue = asyncio.Queue()
+        for item in requests:
+            queue.put_nowait(item)
+        await asyncio.gather(*(connection(queue) for _ in range(concurrency)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return summary(latencies, statuses, time.perf_counter() - started)
+
+
+def run(requests=500, concurrency=32, wsgi_threads=4, asgi_threads=16,
+        only=None, seed=0):
+    items = plan(requests, only, seed)
+    wsgi = get_wsgi_application()
+    asgi = WsgiToAsgi(wsgi, threads=asgi_threads)
+    try:
+        return {
+            'concurrency': concurrency,
+            'wsgi': dict(run_wsgi(wsgi, items, concurrency, wsgi_threads),
+                         threads=wsgi_threads),
+            'asgi': dict(run_asgi(asgi, items, concurrency),
+                         threads=asgi_threads),
+        }
+    finally:
+        asgi.executor.shutdown()
@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_and_run(self):
+        '''Набор данных создаётся, а замер пишет JSON по всем страницам'''
+        call_command('bench_seed', users=20, groups=3, posts=60,
+                     comments=100, follows=2, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertTrue(Follow.objects.exists())
+        self.assertEqual(AuthorStats.objects.count(), 20)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.json')
+            call_command('bench_run', requests=3, warmup=1, sample=5,
+                         output=path)
+            call_command('bench_run', requests=3, warmup=0, sample=5,
+                         output=path, compare=path)
+            with open(path, encoding='utf-8') as file:
+                report = json.load(file)
+        self.assertEqual(
+            set(report['views']),
+            {'index', 'group_posts', 'profile', 'post_view', 'follow_index'})
+        for metrics in report['views'].values():
+            self.assertEqual(metrics['statuses'], [200])
+            self.assertLessEqual(metrics['p50_ms'], metrics['p99_ms'])
+        self.assertIn('index', report['compare']['delta_percent'])
+
+    def test_auth(self):
+        '''Профиль cached обходится без запросов сессии и пользователя'''
+        reader = User.objects.create(username='reader')
+        Follow.objects.create(
+            user=reader, author=User.objects.create(username='author'))
+        output = StringIO()
+        call_command('bench_auth', requests=2, warmup=1, stdout=output)
+        report = json.loads(output.getvalue())
+        for page in ('index', 'follow_index'):
+            self.assertEqual(report['db'][page]['statuses'], [200])
+            self.assertGreater(report['db'][page]['auth_queries_mean'], 0)
+            self.assertEqual(report['cached'][page]['auth_queries_mean'], 0)
@@ -0,0 +1,68 @@
+"""Общие приёмы для массовой загрузки записей через bulk_create."""
+import itertools
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import Max
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Временно отключает auto_now_add, чтобы сохранить заданные даты."""
+    saved = [(field, field.auto_now_add) for field in fields]
+    for field, _ in saved:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in saved:
+            field.auto_now_add = value
+
+
+def reserve_ids(model, count):
+    """
+    Резервирует count первичных ключей подряд и возвращает первый.
+
+    SQLite не возвращает id из bulk_create, поэтому ключи выделяются
+    заранее и внешние ключи известны без повторных запросов. Счётчик
+    AUTOINCREMENT в sqlite_sequence сдвигается сразу на count: обычные
+    вставки во время загрузки получают ключи выше резерва, а id
+    удалённых строк не выдаются повторно (Max(pk) + 1 выдал бы их).
+    """
+    if connection.vendor != 'sqlite':
+        raise NotImplementedError(
+            'Резервирование ключей реализовано только для SQLite')
+    table = model._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        # UPDATE первым: транзакция сразу берёт блокировку записи.
+        cursor.execute(
+            'UPDATE sqlite_sequence SET seq = seq + %s WHERE name = %s',
+            [count, table])
+        if not cursor.rowcount:
+            start = model.objects.aggregate(last=Max('pk'))['last'] or 0
+            cursor.execute(
+                'INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)',
+                [table, start + count])
+            return start + 1
+        cursor.execute(
+            'SELECT seq FROM sqlite_sequence WHERE name = %s', [table])
+        return cursor.fetchone()[0] - count + 1
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Команды, которые пересчитывают данные, обычно поддерживаемые сигналами:
+# bulk_create сигналов не отправляет.
+DERIVED_COMMANDS = (
+    'recount_comments',
+    'recount_author_stats',
+    'rebuild_timeline',
+    'rebuild_search_index',
+)
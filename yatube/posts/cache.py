@@ -0,0 +1,177 @@
+"""
+Поколенческий кеш страниц.
+
+Каждой ленте соответствует штамп версии в кеше (время последнего
+изменения). Страницы кешируются без срока под ключом, в который
+входит штамп, поэтому изменение ленты сразу делает старые
+страницы недостижимыми, а до него они отдаются без запросов к БД.
+
+Кроме общей ленты штампы есть у группы, автора и поста: по ним
+страницы группы, профиля и поста отвечают на условный GET.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from yatube.replicas import may_lag
+
+FEED = 'feed'
+GROUP = 'group'
+AUTHOR = 'author'
+POST = 'post'
+# Ленты RSS/Atom меняются только при создании, правке и удалении постов.
+STREAM = 'stream'
+# «Популярное» меняется при пересчёте рейтинга (posts.trending), а
+# также вместе с карточками постов: правка, удаление, переименование.
+TRENDING = 'trending'
+
+
+def stamp_key(*parts):
+    return 'stamp:' + ':'.join(str(part) for part in parts)
+
+
+def get_stamp(*parts):
+    key = stamp_key(*parts)
+    stamp = cache.get(key)
+    if stamp is None:
+        cache.add(key, time.time(), None)
+        stamp = cache.get(key)
+    return stamp
+
+
+def touch(*parts):
+    cache.set(stamp_key(*parts), time.time(), None)
+
+
+def touch_card(post_id, username, *slugs):
+    """Помечает изменёнными все страницы, где видна карточка поста."""
+    touch(FEED)
+    touch(TRENDING)
+    touch(POST, post_id)
+    touch(AUTHOR, username)
+    for slug in slugs:
+        if slug is not None:
+            touch(GROUP, slug)
+
+
+def touch_cards(rows):
+    """
+    touch_card и touch_streams для строк (post_id, username, slug)
+    одной записью в кеш.
+    """
+    keys = {stamp_key(FEED), stamp_key(TRENDING), stamp_key(STREAM)}
+    for post_id, username, slug in rows:
+        keys.add(stamp_key(POST, post_id))
+        keys.add(stamp_key(AUTHOR, username))
+        keys.add(stamp_key(STREAM, AUTHOR, username))
+        if slug is not None:
+            keys.add(stamp_key(GROUP, slug))
+            keys.add(stamp_key(STREAM, GROUP, slug))
+    cache.set_many(dict.fromkeys(keys, time.time()), None)
+
+
+def touch_streams(username, *slugs):
+    """Помечает изменёнными ленты RSS/Atom, в которые входит пост."""
+    touch(STREAM)
+    touch(STREAM, AUTHOR, username)
+    for slug in slugs:
+        if slug is not None:
+            touch(STREAM, GROUP, slug)
+
+
+def touch_post(post_id):
+    """То же, что touch_card, но автор и группа читаются из базы."""
+    from .models import Post
+
+    row = Post.objects.filter(pk=post_id).values_list(
+        'author__username', 'group__slug').first()
+    if row is None:
+        touch(FEED)
+        touch(TRENDING)
+        return
+    touch_card(post_id, *row)
+
+
+def viewer_key(request):
+    """Аноним видит общую страницу, у вошедшего своя навигация."""
+    if request.user.is_authenticated:
+        return f'user{request.user.pk}'
+    return 'anon'
+
+
+def feed_cache(*parts):
+    """Кеширует GET-ответ до смены штампа ленты parts."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            stamp = get_stamp(*parts)
+            key = 'page:{}:{}:{}:{}'.format(
+                ':'.join(parts), stamp, viewer_key(request), path)
+            content = cache.get(key)
+            if content is not None:
+                return HttpResponse(content)
+            response = view(request, *args, **kwargs)
+            if (response.status_code == 200 and not response.streaming
+                    and not may_lag(stamp)):
+                cache.set(key, response.content, None)
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_page(stamps, per_viewer=True):
+    """
+    Условный GET и общий кеш страницы по штампам сущностей.
+
+    stamps(*args, **kwargs) получает аргументы view и возвращает
+    список штампов вида (GROUP, slug). Проверка идёт до вызова view
+    и не обращается к базе: при совпадении ETag или Last-Modified
+    отдаётся 304, при наличии готовой страницы в кеше — она.
+    per_viewer=False — страница одна для всех (например, RSS).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            values = [get_stamp(*parts) for parts in stamps(*args, **kwargs)]
+            viewer = viewer_key(request) if per_viewer else 'all'
+            if per_viewer and request.user.is_authenticated:
+                # В странице вошедшего есть CSRF-токен, привязанный к cookie.
+                viewer += ':' + request.COOKIES.get(
+                    settings.CSRF_COOKIE_NAME, '')
+            digest = hashlib.md5('{}:{}:{}'.format(
+                values, viewer, request.get_full_path()).encode()).hexdigest()
+            etag = f'"{digest}"'
+            last_modified = math.ceil(max(values))
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                return response
+            key = f'page:{digest}'
+            cached = cache.get(key)
+            if cached is not None:
+                content_type, content = cached
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                response = view(request, *args, **kwargs)
+                if (response.status_code != 200 or response.streaming
+                        or may_lag(max(values))):
+                    return response
+                cache.set(
+                    key, (response['Content-Type'], response.content), None)
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            return response
+        return wrapper
+    return decorator
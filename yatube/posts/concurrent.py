@@ -0,0 +1,78 @@
+"""
+Параллельное выполнение независимых запросов одного view.
+
+ORM в Django 2.2 синхронный, поэтому запросы расходятся по потокам,
+у каждого из которых своё соединение с базой. Внутри транзакции
+(atomic, тесты на TestCase) другие соединения не видят её данных,
+поэтому там функции выполняются по очереди в текущем потоке.
+
+Функции получают копию контекста (contextvars) вызывающего потока,
+так что выбор реплики для чтения сохраняется. Обёртки execute из
+wrap_queries ставятся и на соединения потоков пула, поэтому замеры
+запросов видят их так же, как при выполнении по очереди.
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+
+_executor = None
+_wrappers = contextvars.ContextVar('execute_wrappers', default=())
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            settings.CONCURRENT_QUERY_WORKERS,
+            thread_name_prefix='queries')
+    return _executor
+
+
+def _install(stack, wrappers):
+    for alias in connections:
+        for wrapper in wrappers:
+            stack.enter_context(connections[alias].execute_wrapper(wrapper))
+
+
+@contextmanager
+def wrap_queries(wrapper):
+    """
+    connection.execute_wrapper для всех баз — и в текущем потоке, и в
+    потоках, где gather выполняет функции. wrapper вызывается из
+    нескольких потоков сразу.
+    """
+    token = _wrappers.set(_wrappers.get() + (wrapper,))
+    try:
+        with ExitStack() as stack:
+            _install(stack, [wrapper])
+            yield
+    finally:
+        _wrappers.reset(token)
+
+
+def _run(function):
+    try:
+        with ExitStack() as stack:
+            _install(stack, _wrappers.get())
+            return function()
+    finally:
+        # Поток пула живёт дольше запроса: соединение закрывается по
+        # тем же правилам CONN_MAX_AGE, что и на границе запроса.
+        close_old_connections()
+
+
+def gather(*functions):
+    """Выполняет функции без аргументов и возвращает их результаты."""
+    if (len(functions) < 2 or not settings.CONCURRENT_QUERY_WORKERS
+            or connection.in_atomic_block):
+        return [function() for function in functions]
+    futures = [
+        get_executor().submit(contextvars.copy_context().run, _run, function)
+        for function in functions[1:]
+    ]
+    # Первая функция выполняется в текущем потоке, пока ждём остальные.
+    first = functions[0]()
+    return [first] + [future.result() for future in futures]
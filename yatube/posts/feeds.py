@@ -0,0 +1,108 @@
+"""
+Ленты RSS и Atom: общая, группы и автора.
+
+Готовый XML кешируется под штампом ленты (STREAM), который меняется
+только при создании, правке или удалении поста из неё, и отдаётся
+с ETag/Last-Modified, так что опрос без изменений отвечает 304.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from .cache import AUTHOR, GROUP, STREAM, conditional_page
+from .models import Group, Post
+
+User = get_user_model()
+
+FEED_SIZE = 20
+
+
+class PostsFeed(Feed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def link(self, obj=None):
+        return reverse('index')
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj=None):
+        return self.posts(obj).select_related('author', 'group')[:FEED_SIZE]
+
+    def item_title(self, item):
+        return Truncator(item.text).words(8)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('post', args=[item.author.username, item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group else []
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('group', args=[obj.slug])
+
+    def posts(self, obj):
+        return obj.group_posts.all()
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: @{obj.username}'
+
+    def description(self, obj):
+        return f'Записи {obj.get_full_name() or obj.username}'
+
+    def link(self, obj):
+        return reverse('profile', args=[obj.username])
+
+    def posts(self, obj):
+        return obj.posts.all()
+
+
+def atom(feed_class):
+    return type(f'Atom{feed_class.__name__}', (feed_class,), {
+        'feed_type': Atom1Feed,
+        'subtitle': feed_class.description,
+    })
+
+
+def cached(feed, *kind):
+    """Кеширует ленту до смены её штампа; аргументы URL входят в штамп."""
+    return conditional_page(
+        lambda **kwargs: [(STREAM, *kind, *kwargs.values())],
+        per_viewer=False)(feed)
+
+
+posts_rss = cached(PostsFeed())
+posts_atom = cached(atom(PostsFeed)())
+group_rss = cached(GroupFeed(), GROUP)
+group_atom = cached(atom(GroupFeed)(), GROUP)
+author_rss = cached(AuthorFeed(), AUTHOR)
+author_atom = cached(atom(AuthorFeed)(), AUTHOR)
@@ -0,0 +1,292 @@
+"""
+Потоковый импорт пользователей, групп, постов, комментариев и подписок
+из JSONL или CSV.
+
+Каждая строка — одна запись с полем type и, для тех, на кого ссылаются,
+входным id. Записи копятся в буферах по типам и пишутся через
+bulk_create пачками, каждая пачка — в своей транзакции. Перед записью
+пачки сбрасываются буферы, от которых она зависит, так что входные id
+всегда можно перевести в id базы по словарям в памяти. Кроме этих
+словарей в памяти держатся только текущие пачки.
+"""
+import csv
+import json
+import logging
+import os
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .bulk import chunks, explicit_dates, reserve_ids
+from .cache import AUTHOR, touch, touch_cards
+from .models import Comment, Follow, Group, Post, User
+
+logger = logging.getLogger(__name__)
+
+DEPENDENCIES = {
+    'user': (),
+    'group': (),
+    'post': ('user', 'group'),
+    'comment': ('user', 'post'),
+    'follow': ('user',),
+}
+
+MODELS = {'user': User, 'group': Group, 'post': Post}
+
+# Естественные ключи: по ним входные записи связываются с уже
+# существующими, а повторный импорт не создаёт дублей.
+NATURAL_KEYS = {
+    'user': (User, 'username'),
+    'group': (Group, 'slug'),
+}
+
+
+def read_records(path):
+    """Читает JSONL или CSV (по расширению) по одной записи."""
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                yield {key: value if value != '' else None
+                       for key, value in row.items()}
+        return
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+class Importer:
+    def __init__(self, batch_size=1000, media_dir=None):
+        self.batch_size = batch_size
+        self.media_dir = media_dir
+        self.buffers = {kind: [] for kind in DEPENDENCIES}
+        self.ids = {'user': {}, 'group': {}, 'post': {}}
+        # Свободные зарезервированные ключи: [следующий, конец).
+        self.reserved = {'user': [0, 0], 'group': [0, 0], 'post': [0, 0]}
+        self.created = dict.fromkeys(DEPENDENCIES, 0)
+        # Посты и пользователи, чьи страницы изменил импорт.
+        self.touched_posts = set()
+        self.touched_users = set()
+        self.known = {}
+        self.skipped = 0
+        self.images = 0
+        self.now = timezone.now()
+
+    def run(self, records):
+        for number, record in enumerate(records, 1):
+            kind = record.get('type')
+            if kind not in DEPENDENCIES:
+                self.skip(number, f'неизвестный тип {kind!r}')
+                continue
+            buffer = self.buffers[kind]
+            buffer.append((number, record))
+            if len(buffer) >= self.batch_size:
+                self.flush(kind)
+        for kind in DEPENDENCIES:
+            self.flush(kind)
+        return self.created
+
+    def touch_pages(self):
+        """
+        Сбрасывает кеш страниц, которые изменил импорт: bulk_create не
+        отправляет сигналов, а страницы кешируются без срока.
+        """
+        touch_cards([])
+        for chunk in chunks(sorted(self.touched_posts), 500):
+            touch_cards(Post.objects.filter(pk__in=chunk).values_list(
+                'pk', 'author__username', 'group__slug'))
+        for chunk in chunks(sorted(self.touched_users), 500):
+            for username in User.objects.filter(pk__in=chunk).values_list(
+                    'username', flat=True):
+                touch(AUTHOR, username)
+
+    def skip(self, number, reason):
+        self.skipped += 1
+        logger.warning('Запись %s пропущена: %s', number, reason)
+
+    def flush(self, kind):
+        for parent in DEPENDENCIES[kind]:
+            self.flush(parent)
+        records, self.buffers[kind] = self.buffers[kind], []
+        if not records:
+            return
+        if kind in NATURAL_KEYS:
+            self.load_known(kind, records)
+        objects = []
+        for number, record in records:
+            try:
+                instance = getattr(self, f'build_{kind}')(record)
+            except (KeyError, ValueError, OSError) as error:
+                self.skip(number, error)
+                continue
+            if instance is not None:
+                objects.append(instance)
+        if not objects:
+            return
+        model = objects[0].__class__
+        date_fields = [field for field in model._meta.fields
+                       if getattr(field, 'auto_now_add', False)]
+        with transaction.atomic(), explicit_dates(*date_fields):
+            if model is Follow:
+                objects = self.new_follows(objects)
+            # Конфликт по зарезервированному ключу — ошибка, а не повод
+            # молча потерять строку; подписки могла добавить и гонка.
+            model.objects.bulk_create(
+                objects, ignore_conflicts=model is Follow)
+        self.created[kind] += len(objects)
+        self.remember(model, objects)
+
+    def remember(self, model, objects):
+        """Запоминает посты и пользователей, чьи страницы изменились."""
+        for instance in objects:
+            if model is Post:
+                self.touched_posts.add(instance.pk)
+            elif model is Comment:
+                self.touched_posts.add(instance.post_id)
+            elif model is Follow:
+                self.touched_users.update(
+                    (instance.user_id, instance.author_id))
+
+    def new_follows(self, follows):
+        """
+        Оставляет только подписки, которых ещё нет ни в базе, ни выше
+        в пачке. Остальные модели конфликтов не дают: id выделяются
+        заново, а пользователи и группы сверяются по NATURAL_KEYS.
+        """
+        pairs = {(follow.user_id, follow.author_id): follow
+                 for follow in follows}
+        for chunk in chunks(list(pairs), 300):
+            condition = Q()
+            for user_id, author_id in chunk:
+                condition |= Q(user_id=user_id, author_id=author_id)
+            for pair in Follow.objects.filter(condition).values_list(
+                    'user_id', 'author_id'):
+                del pairs[pair]
+        return list(pairs.values())
+
+    def allocate(self, kind, source_id):
+        reserved = self.reserved[kind]
+        if reserved[0] == reserved[1]:
+            first = reserve_ids(MODELS[kind], self.batch_size)
+            reserved[:] = [first, first + self.batch_size]
+        pk = reserved[0]
+        reserved[0] += 1
+        if source_id is not None:
+            self.ids[kind][str(source_id)] = pk
+        return pk
+
+    def resolve(self, kind, source_id, required=True):
+        if source_id is None and not required:
+            return None
+        pk = self.ids[kind].get(str(source_id))
+        if pk is None:
+            raise ValueError(f'нет записи {kind} с id {source_id}')
+        return pk
+
+    def date(self, value):
+        if not value:
+            return self.now
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(f'неверная дата {value!r}')
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    def load_known(self, kind, records):
+        model, field = NATURAL_KEYS[kind]
+        values = [record.get(field) for _, record in records]
+        self.known = {}
+        for chunk in chunks(values, 500):
+            self.known.update(model.objects.filter(
+                **{f'{field}__in': chunk}).values_list(field, 'pk'))
+
+    def existing(self, kind, key, source_id):
+        """Связывает запись с уже существующей по естественному ключу."""
+        pk = self.known.get(key)
+        if pk is not None and source_id is not None:
+            self.ids[kind][str(source_id)] = pk
+        return pk
+
+    def create(self, kind, key, source_id):
+        pk = self.allocate(kind, source_id)
+        self.known[key] = pk
+        return pk
+
+    def build_user(self, record):
+        username = record['username']
+        if self.existing('user', username, record.get('id')):
+            return None
+        date_joined = self.date(record.get('date_joined'))
+        return User(
+            id=self.create('user', username, record.get('id')),
+            username=username,
+            first_name=record.get('first_name') or '',
+            last_name=record.get('last_name') or '',
+            email=record.get('email') or '',
+            password=record.get('password') or make_password(None),
+            date_joined=date_joined,
+        )
+
+    def build_group(self, record):
+        slug = record['slug']
+        if self.existing('group', slug, record.get('id')):
+            return None
+        title = record['title']
+        return Group(
+            id=self.create('group', slug, record.get('id')),
+            title=title,
+            slug=slug,
+            description=record.get('description') or '',
+        )
+
+    def build_post(self, record):
+        author_id = self.resolve('user', record.get('author'))
+        group_id = self.resolve('group', record.get('group'), required=False)
+        text = record['text']
+        pub_date = self.date(record.get('pub_date'))
+        image = self.copy_image(record.get('image'))
+        return Post(
+            id=self.allocate('post', record.get('id')),
+            author_id=author_id,
+            group_id=group_id,
+            text=text,
+            pub_date=pub_date,
+            image=image,
+        )
+
+    def build_comment(self, record):
+        return Comment(
+            post_id=self.resolve('post', record.get('post')),
+            author_id=self.resolve('user', record.get('author')),
+            text=record['text'],
+            created=self.date(record.get('created')),
+        )
+
+    def build_follow(self, record):
+        user_id = self.resolve('user', record.get('user'))
+        author_id = self.resolve('user', record.get('author'))
+        if user_id == author_id:
+            raise ValueError('подписка на самого себя')
+        return Follow(user_id=user_id, author_id=author_id)
+
+    def copy_image(self, name):
+        """Копирует файл из --media-dir в хранилище постов."""
+        if not name:
+            return None
+        if self.media_dir is None:
+            raise ValueError(f'не указан каталог изображений для {name}')
+        root = os.path.realpath(self.media_dir)
+        source = os.path.realpath(os.path.join(root, name))
+        if not source.startswith(root + os.sep):
+            raise ValueError(f'путь {name} вне каталога изображений')
+        with open(source, 'rb') as file:
+            saved = default_storage.save(
+                f'posts/{os.path.basename(source)}', File(file))
+        self.images += 1
+        return saved
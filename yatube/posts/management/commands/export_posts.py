@@ -0,0 +1,59 @@
+import gzip
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает посты, комментарии и подписки в NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Файл выгрузки; если имя оканчивается на .gz, он сжимается.')
+        parser.add_argument(
+            '--types', nargs='+', choices=list(export.SOURCES),
+            default=list(export.SOURCES))
+        parser.add_argument(
+            '--checkpoint', metavar='FILE',
+            help='Прошлая выгрузка: выгрузить только строки после неё.')
+        for kind in export.SOURCES:
+            parser.add_argument(
+                f'--since-{kind}-id', type=int,
+                help=f'Выгрузить записи {kind} с id больше указанного.')
+        parser.add_argument(
+            '--since', help='Дата ISO 8601: посты и комментарии не раньше.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def load_checkpoint(self, path):
+        opener = gzip.open if path.endswith('.gz') else open
+        try:
+            with opener(path, 'rt', encoding='utf-8') as file:
+                return export.read_checkpoint(file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Не удалось прочитать {path}: {error}')
+
+    def handle(self, *args, **options):
+        checkpoint = {}
+        if options['checkpoint']:
+            checkpoint = self.load_checkpoint(options['checkpoint'])
+        for kind in export.SOURCES:
+            if options[f'since_{kind}_id'] is not None:
+                checkpoint[kind] = options[f'since_{kind}_id']
+        since = None
+        if options['since']:
+            try:
+                since = export.parse_since(options['since'])
+            except ValueError as error:
+                raise CommandError(f'Неверная дата: {error}')
+        lines = export.export_lines(
+            options['types'], checkpoint, since, options['chunk_size'])
+        output = options['output']
+        if not output:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(output, 'wb') as file:
+            for block in export.encode(lines, output.endswith('.gz')):
+                file.write(block)
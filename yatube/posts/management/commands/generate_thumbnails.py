@@ -0,0 +1,61 @@
+import multiprocessing
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+
+
+def init_worker():
+    django.setup()
+    # Соединения родителя не должны использоваться в дочерних процессах.
+    connections.close_all()
+
+
+def generate_batch(images):
+    """Работает только с файлами; описания вариантов пишет родитель."""
+    results = []
+    for post_id, name in images:
+        try:
+            results.append((post_id, thumbnails.process(post_id, name)))
+        except Exception:
+            thumbnails.logger.exception(
+                'Не удалось подготовить изображение %s', name)
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт миниатюры и адаптивные варианты изображений всех постов '
+        'в нескольких процессах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=multiprocessing.cpu_count(),
+            help='Число процессов-обработчиков.')
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько изображений отдавать процессу за раз.')
+
+    def batches(self, batch_size):
+        batch = []
+        for image in thumbnails.images_to_generate().iterator():
+            batch.append(image)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def handle(self, *args, **options):
+        batches = list(self.batches(options['batch_size']))
+        connections.close_all()
+        done = 0
+        with multiprocessing.Pool(
+                options['processes'], initializer=init_worker) as pool:
+            for results in pool.imap_unordered(generate_batch, batches):
+                for post_id, metadata in results:
+                    done += thumbnails.save_variants(post_id, metadata)
+        self.stdout.write(f'Подготовлено изображений: {done}')
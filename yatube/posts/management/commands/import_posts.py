@@ -0,0 +1,58 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.bulk import DERIVED_COMMANDS
+from posts.importer import Importer, read_records
+from tasks.queue import enqueue
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует пользователей, группы, посты, комментарии и подписки '
+        'из JSONL или CSV пачками через bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='+',
+            help='Файлы .jsonl или .csv; у каждой записи есть поле type.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько записей одного типа писать за одну транзакцию.')
+        parser.add_argument(
+            '--media-dir',
+            help='Каталог, относительно которого указаны изображения.')
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Не пересчитывать счётчики, ленты и поисковый индекс.')
+        parser.add_argument(
+            '--defer-derived', action='store_true',
+            help='Поставить пересчёт в очередь задач вместо выполнения.')
+
+    def records(self, paths):
+        for path in paths:
+            try:
+                yield from read_records(path)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Не удалось прочитать {path}: {error}')
+
+    def handle(self, *args, **options):
+        importer = Importer(
+            batch_size=options['batch_size'],
+            media_dir=options['media_dir'],
+        )
+        created = importer.run(self.records(options['paths']))
+        for kind, total in created.items():
+            self.stdout.write(f'{kind}: {total}')
+        self.stdout.write(
+            f'Изображений: {importer.images}, пропущено: {importer.skipped}')
+        if not options['skip_derived']:
+            commands = list(DERIVED_COMMANDS)
+            if importer.images:
+                commands.append('generate_thumbnails')
+            for command in commands:
+                if options['defer_derived']:
+                    enqueue('posts.run_command', command)
+                else:
+                    call_command(command, stdout=self.stdout)
+        importer.touch_pages()
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс постов, читая таблицу пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько постов читать и записывать за раз.')
+
+    def handle(self, *args, **options):
+        total = get_backend().rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(f'Проиндексировано постов: {total}')
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+from posts.models import Follow, TimelineEntry
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает ленты подписок (TimelineEntry) по графу подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько подписок обрабатывать за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        TimelineEntry.objects.all().delete()
+        last_id = 0
+        rebuilt = 0
+        while True:
+            follows = list(
+                Follow.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', 'user_id', 'author_id')[:batch_size]
+            )
+            if not follows:
+                break
+            last_id = follows[-1][0]
+            with transaction.atomic():
+                for _, user_id, author_id in follows:
+                    timeline.backfill(user_id, author_id)
+            rebuilt += len(follows)
+        self.stdout.write(f'Перестроено подписок: {rebuilt}')
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from posts.models import AuthorStats, Follow, Post, User
+
+
+def totals(queryset, field, ids):
+    return dict(
+        queryset.filter(**{f'{field}__in': ids})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('id'))
+        .values_list(field, 'total')
+    )
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает AuthorStats пачками и чинит расхождения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько пользователей обрабатывать за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        checked = 0
+        while True:
+            ids = list(
+                User.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            followers = totals(Follow.objects, 'author_id', ids)
+            following = totals(Follow.objects, 'user_id', ids)
+            posts = totals(Post.objects, 'author_id', ids)
+            with transaction.atomic():
+                AuthorStats.objects.filter(pk__in=ids).delete()
+                AuthorStats.objects.bulk_create(
+                    AuthorStats(
+                        user_id=user_id,
+                        followers=followers.get(user_id, 0),
+                        following=following.get(user_id, 0),
+                        posts=posts.get(user_id, 0),
+                    )
+                    for user_id in ids
+                )
+            checked += len(ids)
+        self.stdout.write(f'Пересчитано пользователей: {checked}')
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает Post.comment_count пачками и чинит расхождения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов обрабатывать за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        checked = fixed = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', 'comment_count')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            actual = dict(
+                Comment.objects.filter(post_id__in=[pk for pk, _ in batch])
+                .order_by()
+                .values('post_id')
+                .annotate(total=Count('id'))
+                .values_list('post_id', 'total')
+            )
+            stale = [
+                Post(pk=pk, comment_count=actual.get(pk, 0))
+                for pk, stored in batch
+                if stored != actual.get(pk, 0)
+            ]
+            with transaction.atomic():
+                Post.objects.bulk_update(stale, ['comment_count'])
+            checked += len(batch)
+            fixed += len(stale)
+        self.stdout.write(
+            f'Проверено постов: {checked}, исправлено: {fixed}')
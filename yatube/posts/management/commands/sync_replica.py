@@ -0,0 +1,34 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик через backup API. '
+        'Заменяет репликацию при локальной проверке чтения с реплик.'
+    )
+
+    def handle(self, *args, **options):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            raise CommandError(
+                'Реплики не настроены: задайте YATUBE_REPLICA=1.')
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        source = sqlite3.connect(primary.settings_dict['NAME'])
+        try:
+            for alias in replicas:
+                connections[alias].close()
+                name = connections[alias].settings_dict['NAME']
+                target = sqlite3.connect(name)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'Реплика {alias} обновлена')
+        finally:
+            source.close()
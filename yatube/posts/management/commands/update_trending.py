@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = ('Учитывает в «Популярном» посты и комментарии, появившиеся '
+            'с прошлого запуска.')
+
+    def handle(self, *args, **options):
+        result = trending.update()
+        self.stdout.write(
+            f'Постов: {result["posts"]}, групп: {result["groups"]}')
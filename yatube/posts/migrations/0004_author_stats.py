@@ -0,0 +1,53 @@
+# Generated by Django 2.2.6 on 2026-10-18 02:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_author_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+
+    def totals(queryset, field):
+        return dict(
+            queryset.order_by().values(field)
+            .annotate(total=Count('id')).values_list(field, 'total')
+        )
+
+    followers = totals(Follow.objects, 'author')
+    following = totals(Follow.objects, 'user')
+    posts = totals(Post.objects, 'author')
+    AuthorStats.objects.bulk_create(
+        AuthorStats(
+            user_id=user_id,
+            followers=followers.get(user_id, 0),
+            following=following.get(user_id, 0),
+            posts=posts.get(user_id, 0),
+        )
+        for user_id in User.objects.values_list('pk', flat=True).iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0003_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('followers', models.PositiveIntegerField(default=0, verbose_name='подписчики')),
+                ('following', models.PositiveIntegerField(default=0, verbose_name='подписки')),
+                ('posts', models.PositiveIntegerField(default=0, verbose_name='записи')),
+            ],
+        ),
+        migrations.RunPython(fill_author_stats, migrations.RunPython.noop),
+    ]
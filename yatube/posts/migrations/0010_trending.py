@@ -0,0 +1,46 @@
+# Generated by Django 2.2.6 on 2026-10-18 03:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_comment_feed_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupTrend',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='posts.Group')),
+                ('score', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PostTrend',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='posts.Post')),
+                ('score', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_post_id', models.PositiveIntegerField(default=0)),
+                ('last_comment_id', models.PositiveIntegerField(default=0)),
+                ('epoch', models.FloatField(default=0)),
+                ('updated', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='posttrend',
+            index=models.Index(fields=['-score'], name='post_trend_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grouptrend',
+            index=models.Index(fields=['-score'], name='group_trend_idx'),
+        ),
+    ]
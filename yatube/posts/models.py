@@ -1,5 +1,9 @@
+import json
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Lookup
+from django.utils.functional import cached_property
 
 User = get_user_model()
 
@@ -13,6 +17,13 @@ class Group(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Название есть в карточках постов: при смене их нужно обновить.
+        instance._loaded_title = instance.__dict__.get('title')
+        return instance
+
 
 class Post(models.Model):
     id = models.AutoField(primary_key=True)
@@ -34,13 +45,80 @@ class Post(models.Model):
         verbose_name='Сообщество',
         help_text='Выберите сообщество')
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    # Описание адаптивных вариантов изображения (см. posts.thumbnails).
+    image_variants = models.TextField(blank=True, default='', editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Меняется при каждом изменении поста и его комментариев;
+    # входит в ключ кеша карточки поста.
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'], name='post_feed_idx'),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_feed_idx'),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_feed_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем группу, чтобы при переносе обновить и старую ленту.
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            self.version += 1
+        super().save(*args, **kwargs)
+
+    @cached_property
+    def _image_variants(self):
+        if not self.image or not self.image_variants:
+            return None
+        variants = json.loads(self.image_variants)
+        if variants.get('source') != self.image.name:
+            return None
+        return variants
+
+    def _srcset(self, image_format):
+        variants = self._image_variants
+        if variants is None:
+            return ''
+        storage = self.image.storage
+        return ', '.join(
+            f'{storage.url(variant["name"])} {variant["width"]}w'
+            for variant in variants['variants']
+            if variant['format'] == image_format
+        )
+
+    @property
+    def image_srcset(self):
+        variants = self._image_variants
+        return self._srcset(variants['fallback']) if variants else ''
+
+    @property
+    def image_webp_srcset(self):
+        return self._srcset('webp')
+
+    @property
+    def image_fallback_url(self):
+        variants = self._image_variants
+        if variants is None:
+            return ''
+        largest = max(
+            (variant for variant in variants['variants']
+             if variant['format'] == variants['fallback']),
+            key=lambda variant: variant['width'])
+        return self.image.storage.url(largest['name'])
+
 
 class Comment(models.Model):
     id = models.AutoField(primary_key=True)
@@ -64,10 +142,27 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['created']
+        indexes = [
+            models.Index(
+                fields=['post', 'created', 'id'],
+                name='comment_post_feed_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем исходный пост, чтобы перенести счётчик при смене поста.
+        instance._loaded_post_id = instance.__dict__.get('post_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Счётчик комментариев обновляется в той же транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -87,3 +182,149 @@ class Follow(models.Model):
                 fields=['user', 'author'],
                 name="unique_followers")
         ]
+
+
+class AuthorStats(models.Model):
+    """Счётчики автора, которые показываются в шапке профиля."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    followers = models.PositiveIntegerField('подписчики', default=0)
+    following = models.PositiveIntegerField('подписки', default=0)
+    posts = models.PositiveIntegerField('записи', default=0)
+
+    def __str__(self):
+        return f'Статистика {self.user_id}'
+
+    @classmethod
+    def recount(cls, user_id):
+        stats, _ = cls.objects.update_or_create(
+            user_id=user_id,
+            defaults={
+                'followers': Follow.objects.filter(author_id=user_id).count(),
+                'following': Follow.objects.filter(user_id=user_id).count(),
+                'posts': Post.objects.filter(author_id=user_id).count(),
+            }
+        )
+        return stats
+
+    @classmethod
+    def for_user(cls, user):
+        try:
+            return cls.objects.get(pk=user.pk)
+        except cls.DoesNotExist:
+            return cls.recount(user.pk)
+
+
+class TimelineEntry(models.Model):
+    """Запись ленты подписок, разложенная по читателям при публикации."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry')
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_feed_idx'),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_author_idx'),
+        ]
+
+
+class SearchTextField(models.TextField):
+    """Колонка полнотекстового индекса: поддерживает lookup __match."""
+
+
+@SearchTextField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class PostSearchIndex(models.Model):
+    """Виртуальная таблица SQLite FTS5 с текстами постов."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='+'
+    )
+    text = SearchTextField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'posts_post_fts'
+
+
+class PostTrend(models.Model):
+    """
+    Рейтинг поста в «Популярном» (см. posts.trending).
+
+    score хранится в единицах эпохи TrendingState.epoch: порядок по
+    нему совпадает с порядком по затухшему рейтингу в любой момент.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trend'
+    )
+    score = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score'], name='post_trend_idx'),
+        ]
+
+
+class GroupTrend(models.Model):
+    """Рейтинг группы в «Популярном», в тех же единицах, что PostTrend."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trend'
+    )
+    score = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score'], name='group_trend_idx'),
+        ]
+
+
+class TrendingState(models.Model):
+    """Единственная строка: докуда обработаны события и эпоха рейтинга."""
+    last_post_id = models.PositiveIntegerField(default=0)
+    last_comment_id = models.PositiveIntegerField(default=0)
+    epoch = models.FloatField(default=0)
+    updated = models.DateTimeField(null=True, blank=True)
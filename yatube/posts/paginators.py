@@ -0,0 +1,190 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from yatube.settings import PAGE_SIZE
+
+from .models import Post
+
+FEED_ORDERING = ('-pub_date', '-id')
+COMMENT_ORDERING = ('created', 'id')
+
+
+def encode_cursor(values):
+    payload = json.dumps(
+        [value.isoformat() if hasattr(value, 'isoformat') else value
+         for value in values],
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Разбирает курсор; для битого или пустого токена возвращает None."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(values, list):
+        return None
+    return [
+        (parse_datetime(value) or value) if isinstance(value, str) else value
+        for value in values
+    ]
+
+
+class CursorPaginator(Paginator):
+    """
+    Постраничный вывод по ключу сортировки (по умолчанию pub_date, id).
+
+    Страница выбирается условием на ключ вместо OFFSET, а общее
+    количество записей не считается, поэтому любая страница
+    стоит одинаково. Отдаёт обычный Page: num_pages подбирается так,
+    чтобы has_next/has_previous работали без COUNT(*).
+
+    object_list может быть списком querysets с одинаковыми ключами
+    (все в одном направлении сортировки) — их страницы сливаются.
+    """
+    cursor_based = True
+
+    def __init__(self, object_list, per_page, ordering=FEED_ORDERING):
+        super().__init__(object_list, per_page)
+        self.ordering = tuple(ordering)
+        self.next_cursor = None
+        self.previous_cursor = None
+        self.num_pages = 1
+
+    def _sources(self):
+        if isinstance(self.object_list, (list, tuple)):
+            return self.object_list
+        return [self.object_list]
+
+    @staticmethod
+    def _field(queryset, name):
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    def _clean(self, values):
+        """
+        Приводит значения курсора к типам полей сортировки.
+
+        Курсор приходит от клиента, поэтому для чужого числа значений
+        или значений не того типа возвращается None — первая страница.
+        """
+        if values is None or len(values) != len(self.ordering):
+            return None
+        queryset = self._sources()[0]
+        cleaned = []
+        for field, value in zip(self.ordering, values):
+            if value is None or isinstance(value, (list, dict)):
+                return None
+            try:
+                cleaned.append(
+                    self._field(queryset, field.lstrip('-')).to_python(value))
+            except (FieldDoesNotExist, ValidationError, TypeError,
+                    ValueError):
+                return None
+        return cleaned
+
+    def _key(self, obj):
+        names = [field.lstrip('-') for field in self.ordering]
+        if isinstance(obj, dict):
+            return [obj[name] for name in names]
+        return [getattr(obj, name) for name in names]
+
+    def _seek(self, queryset, values, forward):
+        condition = Q()
+        for position, field in enumerate(self.ordering):
+            descending = field.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{field.lstrip("-")}__{lookup}': values[position]})
+            for previous, value in zip(self.ordering[:position], values):
+                step &= Q(**{previous.lstrip('-'): value})
+            condition |= step
+        return queryset.filter(condition)
+
+    def _fetch(self, values, forward):
+        ordering = self.ordering
+        if not forward:
+            ordering = [
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in ordering
+            ]
+        sources = self._sources()
+        rows = []
+        for queryset in sources:
+            if values is not None:
+                queryset = self._seek(queryset, values, forward)
+            rows.extend(queryset.order_by(*ordering)[:self.per_page + 1])
+        if len(sources) > 1:
+            rows.sort(key=self._key, reverse=ordering[0].startswith('-'))
+            unique, seen = [], set()
+            for row in rows:
+                key = tuple(self._key(row))
+                if key not in seen:
+                    seen.add(key)
+                    unique.append(row)
+            rows = unique
+        return rows[:self.per_page + 1]
+
+    def cursor_page(self, after=None, before=None):
+        after = self._clean(decode_cursor(after))
+        before = self._clean(decode_cursor(before))
+        if before is not None:
+            rows = self._fetch(before, forward=False)
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        elif after is not None:
+            rows = self._fetch(after, forward=True)
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = True
+        else:
+            rows = self._fetch(None, forward=True)
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = False
+        if not rows and (has_previous or has_next):
+            # Курсор указывает за пределы ленты: показываем её начало.
+            return self.cursor_page()
+        if has_previous:
+            self.previous_cursor = encode_cursor(self._key(rows[0]))
+        if has_next:
+            self.next_cursor = encode_cursor(self._key(rows[-1]))
+        number = 2 if has_previous else 1
+        self.num_pages = number + 1 if has_next else number
+        return self._get_page(rows, number, self)
+
+
+def hydrate_posts(page):
+    """Заменяет строки с post_id на посты, сохраняя порядок страницы."""
+    ids = [row['post_id'] for row in page.object_list]
+    posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+    page.object_list = [posts[pk] for pk in ids if pk in posts]
+    return page
+
+
+def get_page(request, object_list, per_page=PAGE_SIZE,
+             ordering=FEED_ORDERING):
+    """
+    Страница ленты по курсорам ?after= / ?before=.
+
+    Номерные страницы (?page=N) оставлены как явный запасной вариант.
+    """
+    if 'page' in request.GET:
+        paginator = Paginator(object_list.order_by(*ordering), per_page)
+        return paginator.get_page(request.GET.get('page'))
+    paginator = CursorPaginator(object_list, per_page, ordering)
+    return paginator.cursor_page(
+        request.GET.get('after'), request.GET.get('before'))
@@ -0,0 +1,114 @@
+"""
+Полнотекстовый поиск по постам.
+
+Бэкенд выбирается настройкой SEARCH_BACKEND. По умолчанию используется
+виртуальная таблица SQLite FTS5 с ранжированием bm25. Индекс
+обновляется сигналами Post, а rebuild_search_index пересобирает его
+целиком. Для других СУБД есть SimpleSearchBackend на icontains.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+from .models import Post, PostSearchIndex
+from .paginators import CursorPaginator, hydrate_posts
+
+DEFAULT_BACKEND = 'posts.search.SQLiteFTSBackend'
+
+
+class BaseSearchBackend:
+    """
+    Интерфейс бэкенда поиска.
+
+    search() возвращает queryset словарей с полями ordering; в них
+    обязательно есть post_id, по которому потом загружаются посты.
+    """
+    ordering = ('-pub_date', '-post_id')
+
+    def search(self, query):
+        raise NotImplementedError
+
+    def update(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self, chunk_size=1000):
+        return 0
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Поиск без индекса: полный просмотр таблицы по icontains."""
+
+    def search(self, query):
+        return (
+            Post.objects.filter(text__icontains=query)
+            .annotate(post_id=F('id'))
+            .values('pub_date', 'post_id')
+        )
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    ordering = ('rank', 'post_id')
+    table = PostSearchIndex._meta.db_table
+
+    @staticmethod
+    def match_expression(query):
+        words = re.findall(r'\w+', query)
+        return ' '.join(f'"{word}"' for word in words)
+
+    def search(self, query):
+        expression = self.match_expression(query)
+        if not expression:
+            return PostSearchIndex.objects.none().values('rank', 'post_id')
+        return PostSearchIndex.objects.filter(
+            text__match=expression).values('rank', 'post_id')
+
+    def update(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table}(rowid, text) VALUES (%s, %s)',
+                [post.pk, post.text])
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [post_id])
+
+    def rebuild(self, chunk_size=1000):
+        rows = Post.objects.order_by().values_list('id', 'text')
+        total = 0
+        chunk = []
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            for row in rows.iterator(chunk_size=chunk_size):
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    total += self._insert(cursor, chunk)
+                    chunk = []
+            total += self._insert(cursor, chunk)
+        return total
+
+    def _insert(self, cursor, chunk):
+        cursor.executemany(
+            f'INSERT INTO {self.table}(rowid, text) VALUES (%s, %s)', chunk)
+        return len(chunk)
+
+
+def get_backend():
+    return import_string(
+        getattr(settings, 'SEARCH_BACKEND', DEFAULT_BACKEND))()
+
+
+def search_page(query, per_page, after=None, before=None):
+    backend = get_backend()
+    # Явный порядок: границы страниц не зависят от плана запроса.
+    results = backend.search(query).order_by(*backend.ordering)
+    paginator = CursorPaginator(results, per_page, backend.ordering)
+    return hydrate_posts(paginator.cursor_page(after, before))
@@ -0,0 +1,176 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.urls import reverse
+
+from tasks.queue import enqueue
+
+from . import search, timeline, trending
+from .cache import (AUTHOR, GROUP, POST, STREAM, touch, touch_card,
+                    touch_cards, touch_post, touch_streams)
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+def change_comment_count(post_id, delta):
+    if post_id is None:
+        return
+    # Счётчик мог разойтись с таблицей (например, после ручной правки):
+    # уход ниже нуля нарушил бы CHECK и сорвал удаление комментария.
+    Post.objects.filter(pk=post_id).update(
+        comment_count=Greatest(F('comment_count') + delta, 0),
+        version=F('version') + 1)
+    # Счётчик комментариев виден в карточках всех лент с постом.
+    touch_post(post_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        change_comment_count(instance.post_id, 1)
+        enqueue('posts.notify_comment', instance.pk,
+                key=f'notify-comment:{instance.pk}')
+        trending.schedule()
+    elif hasattr(instance, '_loaded_post_id'):
+        previous = instance._loaded_post_id
+        if previous != instance.post_id:
+            change_comment_count(previous, -1)
+            change_comment_count(instance.post_id, 1)
+        elif instance.post_id is not None:
+            # Изменился текст: он виден на странице поста и во фрагментах.
+            touch(POST, instance.post_id)
+    instance._loaded_post_id = instance.post_id
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    change_comment_count(instance.post_id, -1)
+
+
+def change_author_stats(user_id, **deltas):
+    updated = AuthorStats.objects.filter(pk=user_id).update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+    if not updated and all(delta > 0 for delta in deltas.values()):
+        # Строки ещё нет (например, после bulk_create): считаем с нуля.
+        AuthorStats.recount(user_id)
+
+
+def renamed(posts):
+    """Имя группы или автора есть в кешированных карточках постов."""
+    posts.update(version=F('version') + 1)
+    touch_cards(posts.values_list('pk', 'author__username', 'group__slug'))
+
+
+# Имя пользователя видно в карточках, полное имя — в лентах RSS/Atom.
+NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    # Вход сохраняет только last_login: лишний запрос ему не нужен.
+    if instance.pk is None or (
+            update_fields is not None
+            and not set(update_fields) & set(NAME_FIELDS)):
+        return
+    instance._loaded_names = User.objects.filter(
+        pk=instance.pk).values_list(*NAME_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.get_or_create(user=instance)
+    previous = getattr(instance, '_loaded_names', None)
+    current = tuple(getattr(instance, field) for field in NAME_FIELDS)
+    if previous is not None and previous != current:
+        renamed(Post.objects.filter(author=instance))
+        # Имя в шапке профиля видно и у автора без постов.
+        touch(AUTHOR, previous[0])
+        touch(AUTHOR, instance.username)
+    instance._loaded_names = None
+
+
+def group_slugs(*group_ids):
+    ids = [pk for pk in group_ids if pk is not None]
+    if not ids:
+        return []
+    return list(Group.objects.filter(pk__in=ids).values_list(
+        'slug', flat=True))
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    touch(GROUP, instance.slug)
+    touch(STREAM, GROUP, instance.slug)
+    previous = getattr(instance, '_loaded_title', instance.title)
+    if previous != instance.title:
+        renamed(instance.group_posts.all())
+    instance._loaded_title = instance.title
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_loaded_group_id', instance.group_id)
+    slugs = group_slugs(instance.group_id, previous)
+    touch_card(instance.pk, instance.author.username, *slugs)
+    touch_streams(instance.author.username, *slugs)
+    instance._loaded_group_id = instance.group_id
+    search.get_backend().update(instance)
+    if created:
+        change_author_stats(instance.author_id, posts=1)
+        timeline.fan_out(instance)
+        trending.schedule()
+    warm_pages(instance.author.username, *slugs)
+
+
+def warm_pages(username, *slugs):
+    """Ставит в очередь рендер первых страниц лент с постом."""
+    if not settings.CACHE_WARMING:
+        return
+    paths = [reverse('index'), reverse('profile', args=[username])]
+    paths += [reverse('group', args=[slug]) for slug in slugs]
+    # Серия правок за одну секунду прогревает страницы один раз.
+    digest = hashlib.md5(':'.join(paths).encode()).hexdigest()
+    enqueue('posts.warm_pages', paths,
+            key=f'warm:{digest}:{int(time.time())}')
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    slugs = group_slugs(instance.group_id)
+    touch_card(instance.pk, instance.author.username, *slugs)
+    touch_streams(instance.author.username, *slugs)
+    search.get_backend().remove(instance.pk)
+    change_author_stats(instance.author_id, posts=-1)
+
+
+def touch_follow(follow):
+    # Подписка меняет счётчики и кнопку в профилях обоих пользователей.
+    for username in User.objects.filter(
+            pk__in=[follow.user_id, follow.author_id]
+    ).values_list('username', flat=True):
+        touch(AUTHOR, username)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    touch_follow(instance)
+    if created:
+        change_author_stats(instance.author_id, followers=1)
+        change_author_stats(instance.user_id, following=1)
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    touch_follow(instance)
+    change_author_stats(instance.author_id, followers=-1)
+    change_author_stats(instance.user_id, following=-1)
+    timeline.prune(instance.user_id, instance.author_id)
+    timeline.follower_left(instance.author_id)
@@ -0,0 +1,17 @@
+// «Показать ещё» подгружает следующую порцию комментариев фрагментом
+// и заменяет кнопку на него; кнопка следующей порции приходит в нём же.
+$(document).on('click', '#comments a[data-fragment]', function (event) {
+  var button = $(this);
+  event.preventDefault();
+  if (button.hasClass('disabled')) {
+    return;
+  }
+  button.addClass('disabled');
+  $.get(button.data('fragment'))
+    .done(function (html) {
+      button.replaceWith(html);
+    })
+    .fail(function () {
+      window.location = button.attr('href');
+    });
+});
@@ -0,0 +1,79 @@
+"""Отложенная работа постов, которую выполняют воркеры run_workers."""
+from io import StringIO
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.mail import send_mail
+from django.core.management import call_command
+from django.test import RequestFactory
+from django.urls import reverse
+
+from tasks.mail import delivery_connection
+from tasks.queue import HIGH, LOW, register
+
+from . import thumbnails, timeline, trending
+from .bulk import DERIVED_COMMANDS
+from .models import Comment, Post
+
+_handler = None
+
+
+@register('posts.process_image', priority=HIGH)
+def process_image(post_id, name):
+    thumbnails.save_variants(post_id, thumbnails.process(post_id, name))
+
+
+@register('posts.fan_out')
+def fan_out(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        timeline.deliver(post)
+
+
+@register('posts.backfill_followers')
+def backfill_followers(author_id):
+    timeline.backfill_followers(author_id)
+
+
+@register('posts.notify_comment', priority=LOW)
+def notify_comment(comment_id):
+    """Письмо автору поста о новом комментарии."""
+    comment = Comment.objects.select_related(
+        'author', 'post__author').filter(pk=comment_id).first()
+    if comment is None or comment.post is None:
+        return
+    recipient = comment.post.author
+    if not recipient.email or recipient == comment.author:
+        return
+    url = reverse('post', args=[recipient.username, comment.post_id])
+    # Письмо уже в воркере, поэтому отправляется напрямую, минуя очередь.
+    send_mail(
+        'Новый комментарий к вашему посту',
+        f'{comment.author.username} прокомментировал ваш пост:\n\n'
+        f'{comment.text}\n\n{url}',
+        None, [recipient.email], connection=delivery_connection())
+
+
+@register('posts.warm_pages', priority=LOW, max_attempts=1)
+def warm_pages(paths):
+    """Рендерит страницы анонима, чтобы они попали в общий кеш."""
+    global _handler
+    if _handler is None:
+        _handler = WSGIHandler()
+    factory = RequestFactory(HTTP_HOST=settings.CACHE_WARM_HOST)
+    for path in paths:
+        response = _handler(factory.get(path).environ, lambda *args: None)
+        response.close()
+
+
+@register('posts.update_trending', priority=LOW)
+def update_trending():
+    trending.update()
+
+
+@register('posts.run_command', priority=LOW)
+def run_command(name):
+    """Пересчёт производных данных после массового импорта."""
+    if name not in DERIVED_COMMANDS + ('generate_thumbnails',):
+        raise ValueError(f'Команда {name} не запускается из очереди')
+    call_command(name, stdout=StringIO())
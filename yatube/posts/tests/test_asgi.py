@@ -0,0 +1,91 @@
+import asyncio
+import threading
+
+from django.test import SimpleTestCase
+
+from yatube.asgi_handler import WsgiToAsgi
+
+
+class EchoApplication:
+    '''WSGI-приложение, отдающее тело запроса и метаданные окружения'''
+    def __init__(self):
+        self.closed_in = None
+
+    def __call__(self, environ, start_response):
+        self.environ = environ
+        self.called_in = threading.current_thread()
+        start_response('201 Created', [('Content-Type', 'text/plain')])
+        return self
+
+    def __iter__(self):
+        yield self.environ['wsgi.input'].read()
+        yield b''
+        yield b'!'
+
+    def close(self):
+        self.closed_in = threading.current_thread()
+
+
+def call(application, scope, chunks):
+    messages = [
+        {'type': 'http.request', 'body': chunk,
+         'more_body': index < len(chunks) - 1}
+        for index, chunk in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+class WsgiToAsgiTests(SimpleTestCase):
+    def test_request_and_response(self):
+        '''Запрос переводится в environ, ответ уходит кусками ASGI'''
+        wsgi = EchoApplication()
+        application = WsgiToAsgi(wsgi, threads=2)
+        self.addCleanup(application.executor.shutdown)
+        scope = {
+            'type': 'http', 'method': 'POST', 'path': '/тест/',
+            'query_string': b'a=1', 'server': ('testserver', 80),
+            'headers': [(b'content-type', b'text/plain'),
+                        (b'x-tag', b'a'), (b'x-tag', b'b')],
+        }
+        sent = call(application, scope, [b'hello, ', b'world'])
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertIn((b'content-type', b'text/plain'), sent[0]['headers'])
+        self.assertEqual(
+            b''.join(message.get('body', b'') for message in sent[1:]),
+            b'hello, world!')
+        self.assertFalse(sent[-1].get('more_body', False))
+        environ = wsgi.environ
+        self.assertEqual(environ['PATH_INFO'], '/тест/'.encode().decode(
+            'latin-1'))
+        self.assertEqual(environ['QUERY_STRING'], 'a=1')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_X_TAG'], 'a,b')
+        self.assertIs(wsgi.closed_in, wsgi.called_in)
+        self.assertIsNot(wsgi.called_in, threading.current_thread())
+
+    def test_disconnect_before_body(self):
+        '''Отключившийся клиент не доходит до приложения'''
+        wsgi = EchoApplication()
+        application = WsgiToAsgi(wsgi, threads=1)
+        self.addCleanup(application.executor.shutdown)
+        sent = []
+
+        async def receive():
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(application(
+            {'type': 'http', 'method': 'GET', 'path': '/'}, receive, send))
+        self.assertEqual(sent, [])
+        self.assertFalse(hasattr(wsgi, 'environ'))
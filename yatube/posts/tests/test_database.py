@@ -0,0 +1,30 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase
+
+from yatube.sqlite3.base import DatabaseWrapper
+
+
+class SQLiteProfileTests(SimpleTestCase):
+    def test_production_pragmas(self):
+        '''Производственный профиль включает WAL и ожидание блокировок'''
+        with tempfile.TemporaryDirectory() as directory:
+            settings_dict = dict(
+                connection.settings_dict,
+                NAME=os.path.join(directory, 'db.sqlite3'),
+                **settings.SQLITE_PROFILES['production'],
+            )
+            wrapper = DatabaseWrapper(settings_dict)
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA busy_timeout')
+                    self.assertEqual(cursor.fetchone()[0], 5000)
+                    cursor.execute('PRAGMA synchronous')
+                    self.assertEqual(cursor.fetchone()[0], 1)
+            finally:
+                wrapper.close()
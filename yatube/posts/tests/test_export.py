@@ -0,0 +1,63 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+def parse(content):
+    return [json.loads(line) for line in content.splitlines() if line]
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+        cls.post = Post.objects.create(text='Первый', author=cls.author)
+        Comment.objects.create(
+            text='Комментарий', author=cls.reader, post=cls.post)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def test_incremental_export(self):
+        '''Повторная выгрузка по checkpoint содержит только новые строки'''
+        with tempfile.TemporaryDirectory() as directory:
+            first = os.path.join(directory, 'first.ndjson.gz')
+            call_command('export_posts', output=first)
+            with gzip.open(first, 'rt', encoding='utf-8') as file:
+                records = parse(file.read())
+            self.assertEqual(
+                [record['type'] for record in records],
+                ['post', 'comment', 'follow', 'checkpoint'])
+            self.assertEqual(records[0]['author'], self.author.pk)
+
+            Post.objects.create(text='Второй', author=self.author)
+            out = StringIO()
+            call_command('export_posts', checkpoint=first, stdout=out)
+        records = parse(out.getvalue())
+        self.assertEqual(
+            [record['type'] for record in records], ['post', 'checkpoint'])
+        self.assertEqual(records[0]['text'], 'Второй')
+
+    def test_export_endpoint_is_staff_only(self):
+        '''Выгрузка по HTTP доступна только персоналу'''
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('export'))
+        self.assertEqual(response.status_code, 302)
+        client.force_login(self.staff)
+        response = client.get(reverse('export'), {'type': 'follow'})
+        records = parse(b''.join(response.streaming_content).decode())
+        self.assertEqual(records[0]['user'], self.reader.pk)
+        self.assertEqual(records[-1]['type'], 'checkpoint')
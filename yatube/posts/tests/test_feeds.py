@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание группы')
+        cls.post = Post.objects.create(
+            text='Запись для ленты', author=cls.author, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_feeds(self):
+        '''Все ленты RSS и Atom содержат запись'''
+        feeds = {
+            reverse('posts_rss'): 'application/rss+xml',
+            reverse('posts_atom'): 'application/atom+xml',
+            reverse('group_rss', args=[self.group.slug]):
+                'application/rss+xml',
+            reverse('group_atom', args=[self.group.slug]):
+                'application/atom+xml',
+            reverse('author_rss', args=[self.author.username]):
+                'application/rss+xml',
+            reverse('author_atom', args=[self.author.username]):
+                'application/atom+xml',
+        }
+        for url, content_type in feeds.items():
+            with self.subTest(url=url):
+                for _ in range(2):
+                    response = self.guest_client.get(url)
+                    self.assertContains(response, 'Запись для ленты')
+                    self.assertTrue(
+                        response['Content-Type'].startswith(content_type))
+
+    def test_feed_conditional_get(self):
+        '''Лента отвечает 304, пока в ней не изменились записи'''
+        url = reverse('group_rss', args=[self.group.slug])
+        etag = self.guest_client.get(url)['ETag']
+        Comment.objects.create(
+            text='Комментарий', author=self.author, post=self.post)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленная запись'
+        post.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Исправленная запись')
+
+    def test_feeds_follow_renames(self):
+        '''Смена названия группы и имени автора обновляет ленты'''
+        url = reverse('posts_rss')
+        self.guest_client.get(url)
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertContains(self.guest_client.get(url), 'Новое название')
+        self.author.first_name = 'Лев'
+        self.author.save()
+        self.assertContains(self.guest_client.get(url), 'Лев')
@@ -0,0 +1,140 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import AuthorStats, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImportPostsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        Image.new('RGB', (100, 50), 'blue').save(
+            os.path.join(self.directory, 'cover.png'))
+        self.existing = User.objects.create(username='leo')
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def test_import_jsonl_and_csv(self):
+        '''Записи из JSONL и CSV связываются по входным id'''
+        records = [
+            {'type': 'user', 'id': 1, 'username': 'leo'},
+            {'type': 'user', 'id': 2, 'username': 'anna'},
+            {'type': 'group', 'id': 7, 'title': 'Романы', 'slug': 'novels'},
+            {'type': 'post', 'id': 10, 'author': 2, 'group': 7,
+             'text': 'Все счастливые семьи похожи друг на друга',
+             'pub_date': '1877-01-01T10:00:00', 'image': 'cover.png'},
+            {'type': 'post', 'id': 11, 'author': 1, 'text': 'Второй'},
+            {'type': 'post', 'id': 12, 'author': 99, 'text': 'Без автора'},
+            {'type': 'follow', 'user': 1, 'author': 2},
+        ]
+        jsonl = self.write('data.jsonl', '\n'.join(
+            json.dumps(record, ensure_ascii=False) for record in records))
+        csv = self.write('comments.csv', (
+            'type,id,post,author,text,created\n'
+            'comment,,10,1,Первый комментарий,\n'
+            'comment,,10,2,Второй комментарий,\n'
+        ))
+        with self.assertLogs('posts.importer', 'WARNING') as logs:
+            call_command('import_posts', jsonl, csv, batch_size=2,
+                         media_dir=self.directory, stdout=StringIO())
+        self.assertIn('нет записи user с id 99', logs.output[0])
+
+        anna = User.objects.get(username='anna')
+        self.assertEqual(User.objects.count(), 2)
+        post = Post.objects.get(author=anna)
+        self.assertEqual(post.group, Group.objects.get(slug='novels'))
+        self.assertEqual(post.pub_date.year, 1877)
+        self.assertTrue(post.image.storage.exists(post.image.name))
+        self.assertEqual(post.comment_count, 2)
+        self.assertEqual(Post.objects.filter(author=self.existing).count(), 1)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertTrue(Follow.objects.filter(
+            user=self.existing, author=anna).exists())
+        self.assertEqual(AuthorStats.objects.get(user=anna).followers, 1)
+
+    def test_existing_follows_are_not_counted(self):
+        '''Уже существующие и повторные подписки не считаются созданными'''
+        anna = User.objects.create(username='anna')
+        Follow.objects.create(user=self.existing, author=anna)
+        records = [
+            {'type': 'user', 'id': 1, 'username': 'leo'},
+            {'type': 'user', 'id': 2, 'username': 'anna'},
+            {'type': 'user', 'id': 3, 'username': 'fyodor'},
+            {'type': 'follow', 'user': 1, 'author': 2},
+            {'type': 'follow', 'user': 3, 'author': 2},
+            {'type': 'follow', 'user': 3, 'author': 2},
+        ]
+        path = self.write('follows.jsonl', '\n'.join(
+            json.dumps(record) for record in records))
+        out = StringIO()
+        call_command('import_posts', path, skip_derived=True, stdout=out)
+        self.assertIn('follow: 1', out.getvalue())
+        self.assertEqual(Follow.objects.count(), 2)
+
+    def test_ids_of_deleted_posts_are_not_reused(self):
+        '''Импорт не выдаёт id удалённых постов и обычных вставок'''
+        deleted_pk = Post.objects.create(
+            text='Удалённый', author=self.existing).pk
+        Post.objects.filter(pk=deleted_pk).delete()
+        records = [
+            {'type': 'user', 'id': 1, 'username': 'leo'},
+            {'type': 'post', 'id': 5, 'author': 1, 'text': 'Импортный'},
+        ]
+        path = self.write('posts.jsonl', '\n'.join(
+            json.dumps(record) for record in records))
+        call_command('import_posts', path, skip_derived=True,
+                     stdout=StringIO())
+        imported = Post.objects.get(text='Импортный')
+        self.assertGreater(imported.pk, deleted_pk)
+        later = Post.objects.create(text='Обычный', author=self.existing)
+        self.assertGreater(later.pk, imported.pk)
+
+    def test_import_refreshes_cached_pages(self):
+        '''После импорта страницы группы, автора и ленты не устаревают'''
+        group = Group.objects.create(
+            title='Группа', slug='g', description='Описание')
+        pages = [reverse('group', args=[group.slug]),
+                 reverse('profile', args=[self.existing.username]),
+                 reverse('author_rss', args=[self.existing.username])]
+        client = Client()
+        for url in pages:
+            client.get(url)
+        records = [
+            {'type': 'user', 'id': 1, 'username': 'leo'},
+            {'type': 'group', 'id': 2, 'slug': 'g', 'title': 'Группа'},
+            {'type': 'post', 'id': 3, 'author': 1, 'group': 2,
+             'text': 'Импортный пост'},
+        ]
+        path = self.write('posts.jsonl', '\n'.join(
+            json.dumps(record) for record in records))
+        call_command('import_posts', path, skip_derived=True,
+                     stdout=StringIO())
+        for url in pages:
+            with self.subTest(url=url):
+                self.assertContains(client.get(url), 'Импортный пост')
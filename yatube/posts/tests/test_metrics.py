@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+import json
+
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.post = Post.objects.create(text='Текст', author=cls.author)
+        for num in range(3):
+            Comment.objects.create(
+                text=f'Комментарий {num}', author=cls.author, post=cls.post)
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_server_timing_header(self):
+        '''Ответ содержит число запросов и время в Server-Timing'''
+        response = self.guest_client.get(reverse('index'))
+        self.assertRegex(
+            response['Server-Timing'],
+            r'db;dur=[\d.]+;desc="\d+ queries", view;dur=[\d.]+;desc="index"')
+
+    @override_settings(QUERY_BUDGETS={'post': 1})
+    def test_budget_warning(self):
+        '''Превышение бюджета запросов пишется в лог'''
+        url = reverse('post', kwargs={
+            'username': self.author.username, 'post_id': self.post.pk})
+        with self.assertLogs('yatube.performance', 'WARNING') as logs:
+            self.guest_client.get(url)
+        self.assertIn('Превышен бюджет запросов для post', logs.output[0])
+
+
+class ConcurrentMetricsTests(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.reader = User.objects.create(username='reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.post = Post.objects.create(text='Текст', author=self.author)
+        Comment.objects.create(
+            text='Комментарий', author=self.reader, post=self.post)
+        self.client.force_login(self.reader)
+
+    def logged_queries(self, url):
+        cache.clear()
+        with self.assertLogs('yatube.performance', 'INFO') as logs:
+            self.client.get(url)
+        return json.loads(logs.records[0].getMessage())['queries']
+
+    def test_gather_queries_are_counted(self):
+        '''Запросы из потоков gather попадают в замер middleware'''
+        urls = [
+            reverse('profile', args=[self.author.username]),
+            reverse('post', kwargs={
+                'username': self.author.username, 'post_id': self.post.pk}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with override_settings(CONCURRENT_QUERY_WORKERS=0):
+                    expected = self.logged_queries(url)
+                with override_settings(CONCURRENT_QUERY_WORKERS=4):
+                    self.assertEqual(self.logged_queries(url), expected)
@@ -1,6 +1,9 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post, User
+from ..models import AuthorStats, Comment, Follow, Group, Post, User
 
 
 class PostsModelTest(TestCase):
@@ -53,3 +56,95 @@ class PostsModelTest(TestCase):
         for value, expected in tests_items.items():
             with self.subTest(value=value):
                 self.assertEqual(value, expected)
+
+
+class CommentCountTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Anon')
+        cls.post = Post.objects.create(text='Первый', author=cls.author)
+        cls.other_post = Post.objects.create(text='Второй', author=cls.author)
+
+    def count(self, post):
+        post.refresh_from_db(fields=['comment_count'])
+        return post.comment_count
+
+    def test_create_and_delete(self):
+        '''Создание и удаление комментария меняют comment_count'''
+        comment = Comment.objects.create(
+            text='Комментарий', author=self.author, post=self.post)
+        self.assertEqual(self.count(self.post), 1)
+        comment.delete()
+        self.assertEqual(self.count(self.post), 0)
+
+    def test_drifted_counter_does_not_go_negative(self):
+        '''Удаление при разошедшемся нулевом счётчике не падает'''
+        comment = Comment.objects.create(
+            text='Комментарий', author=self.author, post=self.post)
+        Post.objects.filter(pk=self.post.pk).update(comment_count=0)
+        comment.delete()
+        self.assertEqual(self.count(self.post), 0)
+
+    def test_reparent(self):
+        '''Перенос комментария к другому посту переносит счётчик'''
+        Comment.objects.create(
+            text='Комментарий', author=self.author, post=self.post)
+        comment = Comment.objects.get(post=self.post)
+        comment.post = self.other_post
+        comment.save()
+        self.assertEqual(self.count(self.post), 0)
+        self.assertEqual(self.count(self.other_post), 1)
+        comment.post = None
+        comment.save()
+        self.assertEqual(self.count(self.other_post), 0)
+
+    def test_recount_command(self):
+        '''recount_comments исправляет рассинхронизацию счётчика'''
+        Comment.objects.create(
+            text='Комментарий', author=self.author, post=self.post)
+        Post.objects.filter(pk=self.post.pk).update(comment_count=7)
+        Post.objects.filter(pk=self.other_post.pk).update(comment_count=3)
+        out = StringIO()
+        call_command('recount_comments', batch_size=1, stdout=out)
+        self.assertEqual(self.count(self.post), 1)
+        self.assertEqual(self.count(self.other_post), 0)
+        self.assertIn('исправлено: 2', out.getvalue())
+
+
+class AuthorStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+
+    def stats(self, user):
+        return AuthorStats.objects.get(pk=user.pk)
+
+    def test_counters_follow_changes(self):
+        '''Подписки и записи отражаются в AuthorStats'''
+        post = Post.objects.create(text='Текст', author=self.author)
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.stats(self.author).posts, 1)
+        self.assertEqual(self.stats(self.author).followers, 1)
+        self.assertEqual(self.stats(self.reader).following, 1)
+        follow.delete()
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts, 0)
+        self.assertEqual(self.stats(self.author).followers, 0)
+        self.assertEqual(self.stats(self.reader).following, 0)
+
+    def test_drifted_counters_do_not_go_negative(self):
+        '''Отписка при разошедшихся нулевых счётчиках не падает'''
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        AuthorStats.objects.update(followers=0, following=0)
+        follow.delete()
+        self.assertEqual(self.stats(self.author).followers, 0)
+        self.assertEqual(self.stats(self.reader).following, 0)
+
+    def test_missing_row_is_recounted(self):
+        '''Отсутствующая строка статистики пересчитывается при чтении'''
+        Post.objects.create(text='Текст', author=self.author)
+        AuthorStats.objects.filter(pk=self.author.pk).delete()
+        self.assertEqual(AuthorStats.for_user(self.author).posts, 1)
@@ -1,8 +1,10 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
 from ..models import Group, Post
+from ..paginators import encode_cursor
 
 User = get_user_model()
 
@@ -25,6 +27,7 @@ class PaginatorViewsTest(TestCase):
 
     def setUp(self):
         self.guest_client = Client()
+        cache.clear()
 
     def test_page_contains_ten_records(self):
         # Проверка: количество постов не привышает
@@ -55,3 +58,50 @@ class PaginatorViewsTest(TestCase):
                     self.assertEqual(
                         response.context.get('page').paginator.per_page,
                         post_per_page)
+
+    def test_cursor_pages(self):
+        # Проверка: курсоры ?after= / ?before= листают ленту без пропусков
+        obj = [
+            Post(text=f'Test {num}', author=self.anyone, group=self.group_ex)
+            for num in range(12)
+        ]
+        Post.objects.bulk_create(obj)
+        expected = list(Post.objects.order_by('-pub_date', '-id'))
+
+        first = self.guest_client.get(reverse('index')).context['page']
+        self.assertEqual(list(first), expected[:10])
+        self.assertTrue(first.has_next())
+        self.assertFalse(first.has_previous())
+
+        second = self.guest_client.get(
+            reverse('index'),
+            {'after': first.paginator.next_cursor}
+        ).context['page']
+        self.assertEqual(list(second), expected[10:])
+        self.assertFalse(second.has_next())
+        self.assertTrue(second.has_previous())
+
+        back = self.guest_client.get(
+            reverse('index'),
+            {'before': second.paginator.previous_cursor}
+        ).context['page']
+        self.assertEqual(list(back), expected[:10])
+
+    def test_broken_cursor_returns_first_page(self):
+        response = self.guest_client.get(
+            reverse('profile', kwargs={'username': self.anyone.username}),
+            {'after': 'not-a-cursor'}
+        )
+        self.assertEqual(list(response.context['page']), [self.post_ex])
+
+    def test_hostile_cursor_returns_first_page(self):
+        # Проверка: курсор с чужими типами или числом значений не роняет view
+        comments_url = reverse('post_comments', kwargs={
+            'username': self.anyone.username, 'post_id': self.post_ex.id})
+        for values in (['abc', 'def'], [[1], 2], [None, 1], [1], {'a': 1}):
+            token = encode_cursor(values)
+            for url in (reverse('index'), comments_url):
+                with self.subTest(values=values, url=url):
+                    response = self.guest_client.get(url, {'after': token})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertFalse(response.context['page'].has_previous())
@@ -0,0 +1,60 @@
+import contextvars
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import resolve, reverse
+
+from yatube.replicas import PIN_COOKIE, ReplicaMiddleware, ReplicaRouter
+
+from ..models import Post
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route(self, request, write=False, in_copy=False):
+        '''Прогоняет запрос через middleware и возвращает базу для чтения'''
+        used = []
+
+        def view(request):
+            used.append(self.router.db_for_read(Post))
+            if write and in_copy:
+                # Так запись выполняет функция из posts.concurrent.gather.
+                contextvars.copy_context().run(
+                    self.router.db_for_write, Post)
+            elif write:
+                self.router.db_for_write(Post)
+            return HttpResponse()
+
+        request.resolver_match = resolve(request.path)
+        middleware = ReplicaMiddleware(lambda request: (
+            middleware.process_view(request, view, (), {}) or view(request)))
+        response = middleware(request)
+        return used[0], response
+
+    def test_feed_reads_from_replica(self):
+        '''Ленты читаются с реплики, остальные страницы — с основной базы'''
+        database, _ = self.route(self.factory.get(reverse('index')))
+        self.assertEqual(database, 'replica')
+        database, _ = self.route(self.factory.get(reverse('new_post')))
+        self.assertEqual(database, 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_write_pins_to_primary(self):
+        '''После записи пользователь читает из основной базы'''
+        request = self.factory.post(reverse('new_post'))
+        _, response = self.route(request, write=True)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        request = self.factory.get(reverse('index'))
+        request.COOKIES[PIN_COOKIE] = '1'
+        database, _ = self.route(request)
+        self.assertEqual(database, 'default')
+
+    def test_write_in_copied_context_pins(self):
+        '''Запись в функции из gather тоже закрепляет основную базу'''
+        request = self.factory.post(reverse('new_post'))
+        _, response = self.route(request, write=True, in_copy=True)
+        self.assertIn(PIN_COOKIE, response.cookies)
@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.rare = Post.objects.create(
+            text='Котики и собаки', author=cls.author)
+        cls.frequent = Post.objects.create(
+            text='Котики, котики, снова котики', author=cls.author)
+        cls.other = Post.objects.create(
+            text='Про погоду', author=cls.author)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query, **params):
+        response = self.guest_client.get(
+            reverse('search'), {'q': query, **params})
+        return response.context['page']
+
+    def test_ranked_results(self):
+        '''Поиск находит посты и ставит самые релевантные первыми'''
+        page = self.search('котики')
+        self.assertEqual(list(page), [self.frequent, self.rare])
+
+    def test_index_follows_edits_and_deletes(self):
+        '''Изменение и удаление поста обновляют индекс'''
+        post = Post.objects.create(text='Прогулка', author=self.author)
+        post.text = 'Котики под дождём'
+        post.save()
+        self.assertIn(post, self.search('дождём'))
+        post.delete()
+        self.assertEqual(list(self.search('дождём')), [])
+
+    def test_pagination(self):
+        '''Результаты поиска листаются курсором'''
+        Post.objects.bulk_create(
+            Post(text=f'Котики {num}', author=self.author)
+            for num in range(11)
+        )
+        call_command('rebuild_search_index', chunk_size=5, stdout=StringIO())
+        first = self.search('котики')
+        self.assertEqual(len(first), 10)
+        second = self.search('котики', after=first.paginator.next_cursor)
+        self.assertEqual(len(second), 3)
+        self.assertFalse(set(first) & set(second))
+
+    @override_settings(SEARCH_BACKEND='posts.search.SimpleSearchBackend')
+    def test_simple_backend(self):
+        '''Запасной бэкенд ищет подстроку без индекса'''
+        self.assertEqual(list(self.search('погод')), [self.other])
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from users import sessions
+from users.backends import CachedModelBackend
+
+User = get_user_model()
+
+
+def auth_queries(captured):
+    return [
+        query['sql'] for query in captured.captured_queries
+        if 'FROM "django_session"' in query['sql']
+        or 'FROM "auth_user"' in query['sql']
+    ]
+
+
+@override_settings(
+    SESSION_ENGINE='users.sessions', SESSION_WRITE_DELAY=3600,
+    AUTHENTICATION_BACKENDS=['users.backends.CachedModelBackend'])
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='reader')
+        self.addCleanup(sessions._pending.clear)
+
+    def test_feed_without_auth_queries(self):
+        '''Повторный запрос вошедшего не читает сессию и пользователя'''
+        client = Client()
+        client.force_login(self.user)
+        client.get(reverse('follow_index'))
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get(reverse('follow_index'))
+        self.assertEqual(response.context['user'], self.user)
+        self.assertEqual(auth_queries(captured), [])
+
+    def test_user_version(self):
+        '''Сохранение пользователя сбрасывает его копию в кеше'''
+        backend = CachedModelBackend()
+        backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(backend.get_user(self.user.pk), self.user)
+        self.user.first_name = 'Новое'
+        self.user.save()
+        self.assertEqual(backend.get_user(self.user.pk).first_name, 'Новое')
+        self.user.delete()
+        self.assertIsNone(backend.get_user(self.user.pk))
+
+    def test_write_behind(self):
+        '''Изменение сессии сразу видно из кеша, а в базу пишется позже'''
+        store = sessions.SessionStore()
+        store['step'] = 1
+        store.create()
+        session = sessions.SessionStore(store.session_key)
+        session['step'] = 2
+        session.save()
+        row = Session.objects.get(session_key=store.session_key)
+        self.assertEqual(row.get_decoded()['step'], 1)
+        cache.clear()
+        self.assertEqual(
+            sessions.SessionStore(store.session_key)['step'], 2)
+        self.assertEqual(sessions.flush_pending(), 1)
+        row = Session.objects.get(session_key=store.session_key)
+        self.assertEqual(row.get_decoded()['step'], 2)
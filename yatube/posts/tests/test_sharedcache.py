@@ -0,0 +1,88 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from yatube import sharedcache
+from yatube.sharedcache import SQLiteCache
+
+
+def increment(location, times):
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.location, {'OPTIONS': options})
+
+    def test_basic_operations(self):
+        '''Значения сохраняют тип, add не перезаписывает, срок соблюдается'''
+        self.cache.set('page', {'content': b'html'})
+        self.cache.set('flag', True)
+        self.assertEqual(self.cache.get('page'), {'content': b'html'})
+        self.assertIs(self.cache.get('flag'), True)
+        self.assertFalse(self.cache.add('page', 'другое'))
+        self.assertTrue(self.cache.add('new', 1))
+        self.cache.set('short', 1, timeout=-1)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertTrue(self.cache.add('short', 2))
+        self.cache.delete('page')
+        self.assertFalse(self.cache.has_key('page'))
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_shared_between_processes(self):
+        '''incr атомарен, а записи видны другим процессам'''
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=increment, args=(self.location, 50))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_lru_eviction_and_size_cap(self):
+        '''При переполнении вытесняются давно не читанные записи'''
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_FREQUENCY=3)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+        original = sharedcache.LRU_RESOLUTION
+        sharedcache.LRU_RESOLUTION = -1
+        try:
+            time.sleep(0.01)
+            cache.get('a')
+        finally:
+            sharedcache.LRU_RESOLUTION = original
+        cache.set('d', 'd')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'a')
+
+        cache = self.make_cache(MAX_SIZE=2000)
+        cache.clear()
+        for number in range(5):
+            cache.set(number, b'x' * 900)
+        self.assertEqual(
+            [cache.has_key(number) for number in range(5)],
+            [False, False, False, True, True])
+
+    def test_cull_frequency_zero_clears(self):
+        '''CULL_FREQUENCY = 0 очищает кеш, оставляя новую запись'''
+        cache = self.make_cache(MAX_ENTRIES=2, CULL_FREQUENCY=0)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+        self.assertEqual(
+            [cache.get(key) for key in ('a', 'b', 'c')], [None, None, 'c'])
@@ -0,0 +1,75 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from users import sessions
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(
+    THROTTLE_RATES={'comment': {'user': '2/m', 'ip': '3/m'}},
+    SESSION_ENGINE='users.sessions', SESSION_WRITE_DELAY=3600,
+    AUTHENTICATION_BACKENDS=['users.backends.CachedModelBackend'])
+class ThrottleTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.post = Post.objects.create(text='Текст', author=cls.author)
+        cls.url = reverse('comment', kwargs={
+            'username': cls.author.username, 'post_id': cls.post.pk})
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(sessions._pending.clear)
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.clock = mock.patch('posts.throttle.time.time', return_value=1e9)
+        self.time = self.clock.start()
+        self.addCleanup(self.clock.stop)
+
+    def comment(self, client=None):
+        return (client or self.client).post(self.url, {'text': 'Коммент'})
+
+    def test_user_bucket(self):
+        '''После исчерпания корзины запись отклоняется до пополнения'''
+        for _ in range(2):
+            self.assertEqual(self.comment().status_code, HTTPStatus.FOUND)
+        # Сессия и пользователь уже в кеше: отказ обходится без базы.
+        with self.assertNumQueries(0):
+            response = self.comment()
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(Comment.objects.count(), 2)
+        self.time.return_value += 30
+        self.assertEqual(self.comment().status_code, HTTPStatus.FOUND)
+
+    def test_ip_bucket(self):
+        '''Корзина IP общая для всех пользователей с одного адреса'''
+        other = Client()
+        other.force_login(User.objects.create(username='other'))
+        self.comment()
+        self.comment()
+        self.assertEqual(self.comment(other).status_code, HTTPStatus.FOUND)
+        self.assertEqual(
+            self.comment(other).status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        # Отказ по IP вернул токен в корзину пользователя: через 20 секунд
+        # у IP появился токен, а у пользователя их больше одного.
+        self.time.return_value += 20
+        self.assertEqual(self.comment(other).status_code, HTTPStatus.FOUND)
+
+    def test_idle_refill_capped(self):
+        '''За долгий простой корзина наполняется не больше ёмкости'''
+        self.comment()
+        self.time.return_value += 3600
+        for _ in range(2):
+            self.assertEqual(self.comment().status_code, HTTPStatus.FOUND)
+        self.assertEqual(
+            self.comment().status_code, HTTPStatus.TOO_MANY_REQUESTS)
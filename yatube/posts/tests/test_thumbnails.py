@@ -0,0 +1,92 @@
+import json
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class DeferredThumbnailTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        content = BytesIO()
+        Image.new('RGB', (1200, 800), 'red').save(content, 'JPEG')
+        self.name = default_storage.save(
+            'posts/big.jpg', SimpleUploadedFile('big.jpg', content.getvalue()))
+
+    def test_template_lookup_does_not_resize(self):
+        '''Без готовой миниатюры отдаётся исходный файл без масштабирования'''
+        image = get_thumbnail(
+            self.name, thumbnails.CARD_GEOMETRY, **thumbnails.CARD_OPTIONS)
+        self.assertEqual(image.name, self.name)
+
+    def test_generated_thumbnail_is_served(self):
+        '''После генерации шаблон получает готовую миниатюру'''
+        generated = thumbnails.generate(self.name)
+        image = get_thumbnail(
+            self.name, thumbnails.CARD_GEOMETRY, **thumbnails.CARD_OPTIONS)
+        self.assertEqual(image.name, generated.name)
+        self.assertEqual((image.width, image.height), (960, 339))
+
+    def test_generate_command(self):
+        '''Команда generate_thumbnails создаёт миниатюры всех постов'''
+        author = User.objects.create(username='author')
+        Post.objects.create(text='С картинкой', author=author, image=self.name)
+        call_command('generate_thumbnails', processes=2, stdout=StringIO())
+        image = get_thumbnail(
+            self.name, thumbnails.CARD_GEOMETRY, **thumbnails.CARD_OPTIONS)
+        self.assertNotEqual(image.name, self.name)
+
+    def test_variants_in_card(self):
+        '''Карточка поста выводит srcset из сохранённых вариантов'''
+        author = User.objects.create(username='author')
+        post = Post.objects.create(text='Картинка', author=author,
+                                   image=self.name)
+        thumbnails.save_variants(
+            post.pk, thumbnails.generate_variants(self.name))
+        post.refresh_from_db()
+        formats = {variant['format'] for variant in json.loads(
+            post.image_variants)['variants']}
+        self.assertEqual(formats, {'jpeg', 'webp'})
+
+        response = Client().get(
+            reverse('profile', kwargs={'username': author.username}))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, '-320.jpg 320w')
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_rerun_reuses_variant_files(self):
+        '''Повторная обработка не оставляет осиротевших файлов вариантов'''
+        author = User.objects.create(username='author')
+        post = Post.objects.create(text='Картинка', author=author,
+                                   image=self.name)
+        thumbnails.save_variants(post.pk, thumbnails.process(
+            post.pk, self.name))
+        first = thumbnails.variant_names(thumbnails.load_variants(post.pk))
+        files = default_storage.listdir('posts/variants')[1]
+        thumbnails.save_variants(post.pk, thumbnails.process(
+            post.pk, self.name))
+        self.assertEqual(
+            thumbnails.variant_names(thumbnails.load_variants(post.pk)),
+            first)
+        self.assertEqual(default_storage.listdir('posts/variants')[1], files)
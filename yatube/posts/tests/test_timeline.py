@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import AuthorStats, Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='reader')
+        cls.author = User.objects.create(username='author')
+        cls.old_post = Post.objects.create(text='Старый', author=cls.author)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def feed(self):
+        response = self.reader_client.get(reverse('follow_index'))
+        return list(response.context['page'])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        '''Подписка добавляет посты автора в ленту, отписка убирает'''
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.feed(), [self.old_post])
+        follow.delete()
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed(), [])
+
+    def test_new_post_fans_out(self):
+        '''Новый пост раскладывается по лентам подписчиков'''
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_is_pulled(self):
+        '''Посты авторов с большим числом подписчиков читаются напрямую'''
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_author_back_under_limit_is_fanned_out(self):
+        '''Посты, опубликованные в режиме pull, не пропадают после отписки'''
+        other = User.objects.create(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        follow = Follow.objects.create(user=other, author=self.author)
+        post = Post.objects.create(text='Новый', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        follow.delete()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_author_jumping_below_limit_is_fanned_out(self):
+        '''Раскладка догоняет автора, перескочившего предел за один шаг'''
+        other = User.objects.create(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        follow = Follow.objects.create(user=other, author=self.author)
+        post = Post.objects.create(text='Новый', author=self.author)
+        # Параллельные отписки: счётчик уже ниже предела.
+        AuthorStats.objects.filter(pk=self.author.pk).update(followers=1)
+        follow.delete()
+        self.assertEqual(self.feed(), [post, self.old_post])
@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import trending
+from ..models import Comment, Group, GroupTrend, Post, PostTrend
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        self.quiet = Post.objects.create(text='Тихий', author=self.author)
+        self.busy = Post.objects.create(
+            text='Обсуждаемый', author=self.author, group=self.group)
+
+    def comment(self, post, times):
+        for num in range(times):
+            Comment.objects.create(
+                text=f'Комментарий {num}', author=self.author, post=post)
+
+    def test_incremental_update(self):
+        '''Пересчёт учитывает только события после прошлого запуска'''
+        self.comment(self.busy, 3)
+        self.assertEqual(trending.update(), {'posts': 2, 'groups': 1})
+        self.assertEqual(trending.top_posts(10), [self.busy, self.quiet])
+        self.assertEqual(trending.top_groups(10), [self.group])
+        scores = dict(PostTrend.objects.values_list('post_id', 'score'))
+        self.assertEqual(trending.update(), {'posts': 0, 'groups': 0})
+        self.assertEqual(
+            dict(PostTrend.objects.values_list('post_id', 'score')), scores)
+        self.comment(self.quiet, 5)
+        self.assertEqual(trending.update(), {'posts': 1, 'groups': 0})
+        self.assertEqual(trending.top_posts(10), [self.quiet, self.busy])
+
+    def test_rebase_and_prune(self):
+        '''Смена эпохи сохраняет порядок, затухшие строки удаляются'''
+        self.comment(self.busy, 3)
+        trending.update()
+        state = trending.get_state()
+        half_lives = trending.REBASE_HALF_LIVES + 1
+        state.epoch -= half_lives * settings.TRENDING_HALF_LIFE
+        state.save()
+        # Те же рейтинги, но набраны давно: ниже порога останутся не все.
+        PostTrend.objects.filter(pk=self.quiet.pk).update(
+            score=settings.TRENDING_MIN_SCORE * 2 ** (half_lives - 1))
+        PostTrend.objects.filter(pk=self.busy.pk).update(
+            score=settings.TRENDING_MIN_SCORE * 2 ** (half_lives + 1))
+        trending.update()
+        self.assertEqual(trending.top_posts(10), [self.busy])
+        score = PostTrend.objects.get(pk=self.busy.pk).score
+        self.assertAlmostEqual(score, settings.TRENDING_MIN_SCORE * 2, 3)
+        self.assertFalse(GroupTrend.objects.exists())
+
+    def test_page_reads_precomputed_table(self):
+        '''Страница /trending/ не агрегирует комментарии'''
+        self.comment(self.busy, 2)
+        trending.update()
+        with CaptureQueriesContext(connection) as captured:
+            response = Client().get(reverse('trending'))
+        self.assertEqual(response.context['posts'], [self.busy, self.quiet])
+        self.assertEqual(response.context['groups'], [self.group])
+        self.assertEqual(len(captured), 2)
+        self.assertFalse(any(
+            'posts_comment' in query['sql']
+            for query in captured.captured_queries))
+
+    def test_page_follows_post_changes(self):
+        '''Правка и удаление поста сразу видны в «Популярном»'''
+        trending.update()
+        client = Client()
+        self.assertContains(client.get(reverse('trending')), 'Тихий')
+        self.quiet.text = 'Исправленный'
+        self.quiet.save()
+        self.assertContains(client.get(reverse('trending')), 'Исправленный')
+        self.quiet.delete()
+        self.assertNotContains(
+            client.get(reverse('trending')), 'Исправленный')
@@ -235,18 +235,117 @@ class PostViewsTests(TestCase):
         )
 
     def test_index_cache(self):
-        '''К странице  подключена система кэширования'''
+        '''Главная страница кешируется до изменения ленты'''
         url = reverse('index')
         response_content = self.guest_client.get(url).content
+        Post.objects.filter(pk=self.post_ex.pk).update(text='Без сигнала')
+        response_content_2 = self.guest_client.get(url).content
+        self.assertEqual(response_content, response_content_2)
         Post.objects.create(
             text='Тестовый текст2',
             author=self.user
         )
-        response_content_2 = self.guest_client.get(url).content
-        self.assertEqual(response_content, response_content_2)
-        cache.clear()
-        response_content_3 = self.guest_client.get(url).content
-        self.assertNotEqual(response_content, response_content_3)
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Тестовый текст2')
+
+    def test_index_cache_varies_on_viewer(self):
+        '''Аноним и вошедший пользователь не делят кеш главной'''
+        url = reverse('index')
+        self.assertNotContains(self.guest_client.get(url), 'Выйти')
+        self.assertContains(self.authorized_client.get(url), 'Выйти')
+        self.assertNotContains(self.guest_client.get(url), 'Выйти')
+
+    def test_post_card_cache_versioned(self):
+        '''Карточка поста кешируется до изменения поста или комментариев'''
+        url = reverse('group', kwargs={'slug': self.group_ex.slug})
+        self.guest_client.get(url)
+        Post.objects.filter(pk=self.post_ex.pk).update(text='Без версии')
+        self.assertNotContains(self.guest_client.get(url), 'Без версии')
+
+        Comment.objects.create(
+            text='Ещё комментарий', author=self.user_2, post=self.post_ex)
+        self.assertContains(self.guest_client.get(url), 'Без версии')
+
+    def test_post_card_follows_renames(self):
+        '''Смена названия группы или имени автора обновляет карточки'''
+        author = User.objects.create(username='writer')
+        group = Group.objects.create(
+            title='Старое название', slug='renamed', description='Описание')
+        Post.objects.create(text='Текст', author=author, group=group)
+        url = reverse('index')
+        self.guest_client.get(url)
+        group.title = 'Новое название'
+        group.save()
+        self.assertContains(self.guest_client.get(url), 'Новое название')
+        author.username = 'renamed'
+        author.save()
+        self.assertContains(self.guest_client.get(url), '@renamed')
+
+    def test_post_card_edit_button_per_viewer(self):
+        '''Кнопка редактирования не попадает в общий кеш карточки'''
+        url = reverse('group', kwargs={'slug': self.group_ex.slug})
+        self.assertContains(self.authorized_client.get(url), 'Редактировать')
+        self.assertNotContains(
+            self.authorized_client_2.get(url), 'Редактировать')
+
+    def test_post_page_conditional_get(self):
+        '''Неизменившийся пост отвечает 304 без запросов к базе'''
+        url = reverse('post', kwargs={
+            'username': self.user.username, 'post_id': self.post_ex.pk})
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Comment.objects.create(
+            text='Новый комментарий', author=self.user_2, post=self.post_ex)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Новый комментарий')
+
+    def test_post_comments_fragment(self):
+        '''«Показать ещё» отдаёт только следующую порцию комментариев'''
+        for num in range(settings.PAGE_SIZE + 2):
+            Comment.objects.create(
+                text=f'Комментарий {num}', author=self.user_2,
+                post=self.post_ex)
+        url = reverse('post', kwargs={
+            'username': self.user.username, 'post_id': self.post_ex.pk})
+        response = self.guest_client.get(url)
+        page = response.context['page']
+        self.assertEqual(len(page.object_list), settings.PAGE_SIZE)
+        fragment_url = '{}?after={}'.format(
+            reverse('post_comments', kwargs={
+                'username': self.user.username, 'post_id': self.post_ex.pk}),
+            page.paginator.next_cursor)
+        self.assertContains(response, fragment_url)
+        with self.assertNumQueries(2):
+            fragment = self.guest_client.get(fragment_url)
+        self.assertTemplateNotUsed(fragment, 'includes/page_info.html')
+        self.assertEqual(
+            [comment.text for comment in fragment.context['page']],
+            ['Комментарий 9', 'Комментарий 10', 'Комментарий 11'])
+        self.assertNotContains(fragment, 'data-fragment')
+        comment = Comment.objects.get(text='Комментарий 11')
+        comment.text = 'Исправленный'
+        comment.save()
+        self.assertContains(
+            self.guest_client.get(fragment_url), 'Исправленный')
+        for username, post_id in (('nobody', 99999),
+                                  (self.user_2.username, self.post_ex.pk)):
+            response = self.guest_client.get(reverse(
+                'post_comments',
+                kwargs={'username': username, 'post_id': post_id}))
+            self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_group_page_stamp(self):
+        '''Перенос поста в другую группу обновляет страницу старой'''
+        url = reverse('group', kwargs={'slug': self.group_ex.slug})
+        self.assertContains(self.guest_client.get(url), 'Тестовый текст')
+        other = Group.objects.create(
+            title='Другая группа', slug='other', description='Описание')
+        post = Post.objects.get(pk=self.post_ex.pk)
+        post.group = other
+        post.save()
+        self.assertNotContains(self.guest_client.get(url), 'Тестовый текст')
 
     def test_follow_auth(self):
         '''
@@ -0,0 +1,110 @@
+"""
+Ограничение частоты записи: корзина токенов в кеше.
+
+Каждая запись в SQLite блокирует остальных писателей, поэтому
+частые POST одного клиента тормозят всех. Декоратор throttle
+проверяет корзины пользователя и IP до вызова view и при нехватке
+токена сразу отвечает 429 с Retry-After — без форм и запросов к
+базе. Токены, уже взятые из других корзин этого запроса, при отказе
+возвращаются.
+
+Корзина хранится одним целым числом в кеше — «часами» израсходованных
+токенов в тысячных долях: spent. Доступно токенов
+capacity + now * rate - spent, запрос увеличивает spent на один токен
+через атомарный cache.incr. Новая корзина создаётся через cache.add со
+значением now * rate, то есть полной. Если за время простоя накопилось
+больше capacity, лишнее списывается тем же incr. Гонка двух
+списаний только уменьшает запас, но никогда не даёт лишний токен.
+Ключ живёт THROTTLE_KEY_TIMEOUT секунд; после истечения корзина
+снова полна — не больше одной лишней пачки за этот срок.
+
+    THROTTLE_RATES = {'comment': {'user': '10/m', 'ip': '30/m'}}
+
+'10/m' — корзина на 10 токенов, пополняется на 10 токенов в минуту.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+# Токены считаются в тысячных, чтобы медленные пополнения не терялись
+# при округлении.
+SCALE = 1000
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, токенов в секунду)."""
+    capacity, period = rate.split('/')
+    return int(capacity), int(capacity) / PERIODS[period[0]]
+
+
+def identities(request):
+    if request.user.is_authenticated:
+        yield 'user', request.user.pk
+    yield 'ip', request.META.get('REMOTE_ADDR', '')
+
+
+def take(key, capacity, rate):
+    """
+    Берёт токен из корзины key.
+
+    Возвращает 0 или число секунд до появления токена.
+    """
+    clock = int(time.time() * rate * SCALE)
+    limit = capacity * SCALE
+    cache.add(key, clock, settings.THROTTLE_KEY_TIMEOUT)
+    try:
+        spent = cache.incr(key, SCALE)
+    except ValueError:
+        # Ключ вытеснен между add и incr: считаем корзину полной.
+        return 0
+    left = limit + clock - spent
+    if left < 0:
+        # Отказ не расходует токен.
+        cache.decr(key, SCALE)
+        return math.ceil(-left / SCALE / rate) or 1
+    if left > limit - SCALE:
+        # За простой накопилось больше, чем вмещает корзина.
+        cache.incr(key, left - (limit - SCALE))
+    return 0
+
+
+def refund(key):
+    """Возвращает токен, взятый из корзины key запросом, которому отказано."""
+    try:
+        cache.decr(key, SCALE)
+    except ValueError:
+        pass
+
+
+def throttle(scope, methods=('POST',)):
+    """Ограничивает запросы methods к view по THROTTLE_RATES[scope]."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rates = settings.THROTTLE_RATES.get(scope, {})
+            if request.method in methods:
+                taken = []
+                for kind, ident in identities(request):
+                    if kind not in rates:
+                        continue
+                    capacity, rate = parse_rate(rates[kind])
+                    key = f'throttle:{scope}:{kind}:{ident}'
+                    wait = take(key, capacity, rate)
+                    if wait:
+                        for previous in taken:
+                            refund(previous)
+                        response = HttpResponse(
+                            'Слишком много запросов, попробуйте позже.',
+                            content_type='text/plain; charset=utf-8',
+                            status=429)
+                        response['Retry-After'] = str(wait)
+                        return response
+                    taken.append(key)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
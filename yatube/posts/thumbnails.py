@@ -0,0 +1,220 @@
+"""
+Миниатюры и адаптивные варианты изображений постов, которые готовятся
+вне запроса.
+
+Шаблонный тег {% thumbnail %} работает через DeferredThumbnailBackend:
+он только ищет готовую миниатюру и, если её ещё нет, отдаёт исходное
+изображение, не декодируя и не масштабируя его. Сами миниатюры
+создаются задачей posts.process_image после сохранения поста и
+командой generate_thumbnails.
+
+Кроме миниатюры для каждого изображения готовится набор вариантов
+по ширинам IMAGE_VARIANT_WIDTHS в WebP и в исходном формате; их
+описание хранится в Post.image_variants, и шаблон строит srcset,
+не обращаясь к хранилищу. Повторная обработка перезаписывает файлы
+под прежними именами, а варианты, которые больше не описаны в посте,
+удаляются.
+"""
+import json
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import F
+from PIL import Image, ImageOps, features
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from tasks.queue import enqueue
+
+from .cache import touch_post
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+CARD_GEOMETRY = '960x339'
+CARD_OPTIONS = {'crop': 'center', 'upscale': True}
+CARD_RATIO = 339 / 960
+VARIANT_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+
+class DeferredThumbnailBackend(ThumbnailBackend):
+    """
+    Никогда не масштабирует изображение в запросе.
+
+    Если миниатюры нет ни в хранилище ключей, ни на диске,
+    возвращается исходный файл.
+    """
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        source = ImageFile(file_)
+        thumbnail = self.thumbnail_file(source, geometry_string, options)
+        cached = default.kvstore.get(thumbnail)
+        if cached:
+            return cached
+        if thumbnail.exists():
+            # Файл уже создан пулом: базовый бэкенд только запишет его
+            # в хранилище ключей, не пересоздавая.
+            return super().get_thumbnail(file_, geometry_string, **options)
+        return source
+
+    def thumbnail_file(self, source, geometry_string, options):
+        # Те же умолчания, что и в ThumbnailBackend.get_thumbnail,
+        # чтобы имя файла совпадало с созданным заранее.
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def create(self, file_, geometry_string, **options):
+        """Создаёт файл миниатюры, не обращаясь к хранилищу ключей."""
+        source = ImageFile(file_)
+        thumbnail = self.thumbnail_file(source, geometry_string, options)
+        if thumbnail.exists():
+            return thumbnail
+        source_image = default.engine.get_image(source)
+        try:
+            options['image_info'] = default.engine.get_image_info(
+                source_image)
+            source.set_size(default.engine.get_image_size(source_image))
+            self._create_thumbnail(
+                source_image, geometry_string, options, thumbnail)
+        finally:
+            default.engine.cleanup(source_image)
+        return thumbnail
+
+
+def generate(name):
+    """Создаёт миниатюру карточки для файла изображения name."""
+    return DeferredThumbnailBackend().create(
+        name, CARD_GEOMETRY, **CARD_OPTIONS)
+
+
+def variant_widths():
+    return getattr(settings, 'IMAGE_VARIANT_WIDTHS', (320, 640, 960))
+
+
+def _encode(image, image_format):
+    content = BytesIO()
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    options = {'quality': 80} if image_format in ('JPEG', 'WEBP') else {}
+    image.save(content, image_format, **options)
+    return ContentFile(content.getvalue())
+
+
+def load_variants(post_id):
+    """Текущее описание вариантов поста или None."""
+    raw = Post.objects.filter(pk=post_id).values_list(
+        'image_variants', flat=True).first()
+    return json.loads(raw) if raw else None
+
+
+def variant_names(metadata):
+    if not metadata:
+        return set()
+    return {variant['name'] for variant in metadata['variants']}
+
+
+def generate_variants(name, previous=None):
+    """
+    Создаёт варианты изображения name по ширинам и форматам.
+
+    Файлы из previous (прежнее описание того же изображения)
+    перезаписываются, а не копятся рядом с новыми суффиксами.
+    Возвращает описание для Post.image_variants.
+    """
+    existing = {}
+    if previous and previous.get('source') == name:
+        existing = {
+            (variant['width'], variant['format']): variant['name']
+            for variant in previous['variants']
+        }
+    with default_storage.open(name) as source_file:
+        source = Image.open(source_file)
+        source.load()
+    original = source.format if source.format in VARIANT_FORMATS else 'JPEG'
+    formats = [original]
+    if original != 'WEBP' and features.check('webp'):
+        formats.append('WEBP')
+    if source.mode not in ('RGB', 'RGBA'):
+        source = source.convert('RGBA' if 'transparency' in source.info
+                                else 'RGB')
+    stem = os.path.splitext(os.path.basename(name))[0]
+    variants = []
+    for width in variant_widths():
+        height = round(width * CARD_RATIO)
+        image = ImageOps.fit(source, (width, height), Image.LANCZOS)
+        for image_format in formats:
+            extension = VARIANT_FORMATS[image_format]
+            target = existing.get((width, image_format.lower()))
+            if target is None:
+                target = f'posts/variants/{stem}-{width}.{extension}'
+            else:
+                default_storage.delete(target)
+            saved = default_storage.save(
+                target, _encode(image, image_format))
+            variants.append({
+                'name': saved, 'width': width, 'height': height,
+                'format': image_format.lower(),
+            })
+    return {'source': name, 'fallback': original.lower(),
+            'variants': variants}
+
+
+def save_variants(post_id, metadata):
+    """
+    Записывает варианты в пост, если его изображение не сменилось,
+    и удаляет файлы прежних вариантов, которых нет в новом описании.
+    """
+    previous = load_variants(post_id)
+    updated = Post.objects.filter(
+        pk=post_id, image=metadata['source']
+    ).update(
+        image_variants=json.dumps(metadata),
+        version=F('version') + 1,
+    )
+    if not updated:
+        # Описание не сохранено: его файлы никому не нужны.
+        stale = variant_names(metadata) - variant_names(previous)
+    else:
+        stale = variant_names(previous) - variant_names(metadata)
+        touch_post(post_id)
+    for name in stale:
+        default_storage.delete(name)
+    return updated
+
+
+def process(post_id, name):
+    """Готовит миниатюру и варианты изображения; возвращает описание."""
+    generate(name)
+    return generate_variants(name, load_variants(post_id))
+
+
+def schedule(post):
+    """Ставит подготовку изображения в очередь задач."""
+    if not post.image:
+        return
+    enqueue('posts.process_image', post.pk, post.image.name,
+            key=f'image:{post.pk}:{post.image.name}')
+
+
+def images_to_generate():
+    return (
+        Post.objects.exclude(image='').exclude(image__isnull=True)
+        .order_by('pk').values_list('pk', 'image')
+    )
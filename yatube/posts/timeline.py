@@ -0,0 +1,164 @@
+"""
+Лента подписок с раскладкой при записи (fan-out-on-write).
+
+Новый пост копируется в TimelineEntry каждого подписчика, и чтение
+ленты становится диапазонным сканом по индексу (user, pub_date).
+Для авторов с числом подписчиков больше TIMELINE_FANOUT_LIMIT записи
+не раскладываются: их посты подмешиваются при чтении (pull). Если
+подписчиков больше TIMELINE_INLINE_FANOUT, раскладка уходит в очередь
+задач, чтобы публикация не ждала её. Когда автор после отписок
+опускается обратно до предела, его недавние посты раскладываются
+подписчикам, иначе опубликованное в режиме pull пропало бы из лент.
+"""
+from django.conf import settings
+from django.db.models import F
+
+from tasks.queue import enqueue
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .paginators import CursorPaginator, hydrate_posts
+
+TIMELINE_ORDERING = ('-pub_date', '-post_id')
+FANOUT_BATCH_SIZE = 500
+
+
+def fanout_limit():
+    return getattr(settings, 'TIMELINE_FANOUT_LIMIT', 1000)
+
+
+def backfill_size():
+    return getattr(settings, 'TIMELINE_BACKFILL', 200)
+
+
+def inline_fanout():
+    return getattr(settings, 'TIMELINE_INLINE_FANOUT', 100)
+
+
+def is_pulled(author_id):
+    return AuthorStats.objects.filter(
+        pk=author_id, followers__gt=fanout_limit()).exists()
+
+
+def follower_count(author_id):
+    return AuthorStats.objects.filter(
+        pk=author_id).values_list('followers', flat=True).first() or 0
+
+
+def fan_out(post):
+    """Раскладывает пост по лентам подписчиков автора."""
+    followers = follower_count(post.author_id)
+    if followers > fanout_limit():
+        return
+    if followers > inline_fanout():
+        enqueue('posts.fan_out', post.pk, key=f'fan-out:{post.pk}')
+        return
+    deliver(post)
+
+
+def deliver(post):
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    batch = []
+    for user_id in follower_ids.iterator():
+        batch.append(TimelineEntry(
+            user_id=user_id, post=post,
+            author_id=post.author_id, pub_date=post.pub_date))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def recent_posts(author_id):
+    return list(Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id').values_list('pk', 'pub_date')[:backfill_size()])
+
+
+def entries(user_id, author_id, posts):
+    return [
+        TimelineEntry(
+            user_id=user_id, post_id=post_id,
+            author_id=author_id, pub_date=pub_date)
+        for post_id, pub_date in posts
+    ]
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту новые подписки последние посты автора."""
+    if is_pulled(author_id):
+        return
+    TimelineEntry.objects.bulk_create(
+        entries(user_id, author_id, recent_posts(author_id)),
+        ignore_conflicts=True)
+
+
+def backfill_followers(author_id):
+    """Раскладывает последние посты автора по лентам всех подписчиков."""
+    if is_pulled(author_id):
+        return
+    posts = recent_posts(author_id)
+    follower_ids = Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True)
+    batch = []
+    for user_id in follower_ids.iterator():
+        batch.extend(entries(user_id, author_id, posts))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def missing_posts(author_id):
+    """Есть ли недавние посты автора, не разложенные его подписчику."""
+    follower_id = Follow.objects.filter(author_id=author_id).values_list(
+        'user_id', flat=True).first()
+    if follower_id is None:
+        return False
+    ids = [post_id for post_id, _ in recent_posts(author_id)]
+    return TimelineEntry.objects.filter(
+        user_id=follower_id, post_id__in=ids).count() < len(ids)
+
+
+def follower_left(author_id):
+    """
+    Вызывается после отписки. Если автор опустился до
+    TIMELINE_FANOUT_LIMIT, его посты больше не подмешиваются при
+    чтении, а опубликованные в режиме pull не были разложены.
+
+    Проверяется сама раскладка, а не равенство пределу: массовое
+    удаление или параллельные отписки проходят предел за один шаг.
+    """
+    followers = follower_count(author_id)
+    if followers > fanout_limit() or not missing_posts(author_id):
+        return
+    if followers > inline_fanout():
+        enqueue('posts.backfill_followers', author_id)
+        return
+    backfill_followers(author_id)
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def sources(user):
+    """Источники ленты: личная раскладка и посты «тяжёлых» авторов."""
+    feed = [
+        TimelineEntry.objects.filter(user=user).values('pub_date', 'post_id')
+    ]
+    pulled = list(Follow.objects.filter(
+        user=user, author__stats__followers__gt=fanout_limit()
+    ).values_list('author_id', flat=True))
+    if pulled:
+        feed.append(
+            Post.objects.filter(author_id__in=pulled)
+            .annotate(post_id=F('id'))
+            .values('pub_date', 'post_id')
+        )
+    return feed
+
+
+def feed_page(user, per_page, after=None, before=None):
+    paginator = CursorPaginator(sources(user), per_page, TIMELINE_ORDERING)
+    return hydrate_posts(paginator.cursor_page(after, before))
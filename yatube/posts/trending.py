@@ -0,0 +1,153 @@
+"""
+«Популярное»: рейтинг постов и групп с затуханием по времени.
+
+Событие (новый пост или комментарий) в момент t добавляет к рейтингу
+weight * 2 ** ((t - epoch) / TRENDING_HALF_LIFE). Рейтинг к моменту
+now равен score * 2 ** (-(now - epoch) / TRENDING_HALF_LIFE): множитель
+общий для всех строк, поэтому порядок по score со временем не
+меняется. Обновление только добавляет вклад событий после
+сохранённых в TrendingState id — старые строки не пересчитываются, а
+страница /trending/ читает верх индекса по -score.
+
+Чтобы score не рос без предела, раз в REBASE_HALF_LIVES периодов
+полураспада эпоха переносится на текущий момент одним UPDATE.
+Строки, затухшие ниже TRENDING_MIN_SCORE, удаляются, и таблицы
+остаются маленькими.
+"""
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from tasks.queue import LOW, enqueue
+
+from .bulk import chunks
+from .cache import TRENDING, touch
+from .models import (Comment, Group, GroupTrend, Post, PostTrend,
+                     TrendingState)
+
+BATCH_SIZE = 1000
+REBASE_HALF_LIVES = 20
+
+
+def growth(seconds):
+    return 2 ** (seconds / settings.TRENDING_HALF_LIFE)
+
+
+def get_state():
+    state, _ = TrendingState.objects.get_or_create(
+        pk=1, defaults={'epoch': time.time()})
+    return state
+
+
+def new_rows(model, since_id, *fields):
+    """Строки model с id больше since_id пачками по BATCH_SIZE."""
+    last_id = since_id
+    while True:
+        rows = list(
+            model.objects.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', *fields)[:BATCH_SIZE])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def collect(state, now):
+    """Вклад новых событий в рейтинги постов и групп; сдвигает state."""
+    weights = settings.TRENDING_WEIGHTS
+    posts, groups = Counter(), Counter()
+
+    def add(post_id, group_id, when, weight):
+        # Событие, затухшее ниже порога ещё до подсчёта, не учитывается.
+        if weight * growth(when.timestamp() - now) < (
+                settings.TRENDING_MIN_SCORE):
+            return
+        value = weight * growth(when.timestamp() - state.epoch)
+        posts[post_id] += value
+        if group_id is not None:
+            groups[group_id] += value
+
+    for rows in new_rows(Post, state.last_post_id, 'group_id', 'pub_date'):
+        for post_id, group_id, pub_date in rows:
+            add(post_id, group_id, pub_date, weights['post'])
+        state.last_post_id = rows[-1][0]
+    for rows in new_rows(Comment, state.last_comment_id,
+                         'post_id', 'post__group_id', 'created'):
+        for _, post_id, group_id, created in rows:
+            if post_id is not None:
+                add(post_id, group_id, created, weights['comment'])
+        state.last_comment_id = rows[-1][0]
+    return posts, groups
+
+
+def apply(model, target, deltas):
+    """Прибавляет deltas к score строк model; target — модель ключа."""
+    for keys in chunks(deltas, BATCH_SIZE):
+        existing = model.objects.in_bulk(keys)
+        for pk, trend in existing.items():
+            trend.score += deltas[pk]
+        model.objects.bulk_update(existing.values(), ['score'])
+        # Пост или группа могли быть удалены после события.
+        alive = target.objects.filter(
+            pk__in=[pk for pk in keys if pk not in existing]
+        ).values_list('pk', flat=True)
+        model.objects.bulk_create(
+            [model(pk=pk, score=deltas[pk]) for pk in alive])
+
+
+def rebase(state, now):
+    elapsed = now - state.epoch
+    if elapsed < REBASE_HALF_LIVES * settings.TRENDING_HALF_LIFE:
+        return
+    factor = growth(-elapsed)
+    for model in (PostTrend, GroupTrend):
+        model.objects.update(score=F('score') * factor)
+    state.epoch = now
+
+
+def prune(state, now):
+    threshold = settings.TRENDING_MIN_SCORE * growth(now - state.epoch)
+    for model in (PostTrend, GroupTrend):
+        model.objects.filter(score__lt=threshold).delete()
+
+
+def update():
+    """Учитывает события с прошлого запуска; возвращает их вклад."""
+    now = time.time()
+    with transaction.atomic():
+        state = get_state()
+        rebase(state, now)
+        posts, groups = collect(state, now)
+        apply(PostTrend, Post, posts)
+        apply(GroupTrend, Group, groups)
+        prune(state, now)
+        state.updated = timezone.now()
+        state.save()
+    touch(TRENDING)
+    return {'posts': len(posts), 'groups': len(groups)}
+
+
+def schedule():
+    """Ставит обновление в очередь не чаще раза в TRENDING_INTERVAL."""
+    interval = settings.TRENDING_INTERVAL
+    enqueue('posts.update_trending', priority=LOW, delay=interval,
+            key=f'trending:{int(time.time() // interval)}')
+
+
+def top_posts(limit):
+    return [
+        trend.post for trend in
+        PostTrend.objects.select_related('post__author', 'post__group')
+        .order_by('-score')[:limit]
+    ]
+
+
+def top_groups(limit):
+    return [
+        trend.group for trend in
+        GroupTrend.objects.select_related('group').order_by('-score')[:limit]
+    ]
@@ -1,17 +1,26 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group'),
+    path('group/<slug:slug>/rss/', feeds.group_rss, name='group_rss'),
+    path('group/<slug:slug>/atom/', feeds.group_atom, name='group_atom'),
+    path('rss/', feeds.posts_rss, name='posts_rss'),
+    path('atom/', feeds.posts_atom, name='posts_atom'),
     path('follow/', views.follow_index, name="follow_index"),
     path('new/', views.new_post, name='new_post'),
+    path('search/', views.search_posts, name='search'),
+    path('trending/', views.trending_posts, name='trending'),
+    path('export/', views.export_data, name='export'),
     path(
         '<str:username>/',
         views.profile,
         name='profile'
     ),
+    path('<str:username>/rss/', feeds.author_rss, name='author_rss'),
+    path('<str:username>/atom/', feeds.author_atom, name='author_atom'),
     path(
         '<str:username>/follow/',
         views.profile_follow,
@@ -26,6 +35,11 @@ urlpatterns = [
         '<str:username>/<int:post_id>/',
         views.post_view,
         name='post'),
+    path(
+        '<str:username>/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path(
         '<str:username>/<int:post_id>/comment/',
         views.post_comment,
@@ -1,23 +1,26 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
 from yatube.settings import PAGE_SIZE
 
+from . import concurrent, export, search, thumbnails, timeline, trending
+from .cache import (AUTHOR, FEED, GROUP, POST, TRENDING, conditional_page,
+                    feed_cache)
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from .models import AuthorStats, Comment, Follow, Group, Post
+from .paginators import COMMENT_ORDERING, get_page
+from .throttle import throttle
 
 User = get_user_model()
 
 
-@cache_page(20)
+@feed_cache(FEED)
 def index(request):
     post_list = Post.objects.select_related('author', 'group').all()
-    paginator = Paginator(post_list, PAGE_SIZE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    page = get_page(request, post_list)
     return render(
         request,
         'index.html',
@@ -25,12 +28,11 @@ def index(request):
     )
 
 
+@conditional_page(lambda slug: [(GROUP, slug)])
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.group_posts.all()
-    paginator = Paginator(post_list, PAGE_SIZE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = group.group_posts.select_related('author', 'group')
+    page = get_page(request, post_list)
     context = {
         'group': group,
         'page': page,
@@ -38,7 +40,28 @@ def group_posts(request, slug):
     return render(request, 'group.html', context)
 
 
+@feed_cache(TRENDING)
+def trending_posts(request):
+    posts, groups = concurrent.gather(
+        lambda: trending.top_posts(PAGE_SIZE),
+        lambda: trending.top_groups(PAGE_SIZE),
+    )
+    return render(
+        request, 'trending.html', {'posts': posts, 'groups': groups})
+
+
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    page = None
+    if query:
+        page = search.search_page(
+            query, PAGE_SIZE,
+            request.GET.get('after'), request.GET.get('before'))
+    return render(request, 'search.html', {'query': query, 'page': page})
+
+
 @login_required
+@throttle('post')
 def new_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     context = {'form': form}
@@ -46,11 +69,13 @@ def new_post(request):
         post = form.save(commit=False)
         post.author = request.user
         form.save()
+        thumbnails.schedule(post)
         return redirect('index')
     return render(request, 'new.html', context)
 
 
 @login_required
+@throttle('post')
 def post_edit(request, username, post_id):
     get_post = get_object_or_404(Post, author__username=username, pk=post_id)
     if get_post.author != request.user:
@@ -61,27 +86,34 @@ def post_edit(request, username, post_id):
         'form': form, 'post': get_post
     }
     if form.is_valid():
-        form.save()
+        post = form.save()
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post)
         return redirect('post', username, post_id)
     return render(request, 'new.html', context)
 
 
+@conditional_page(lambda username: [(AUTHOR, username)])
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, PAGE_SIZE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    count_of_posts = paginator.count
+    post_list = author.posts.select_related('author', 'group')
     request_user = request.user
-    if request_user.is_authenticated and request_user != author:
-        following = Follow.objects.filter(
+    check_following = (
+        request_user.is_authenticated and request_user != author)
+    page, stats, following = concurrent.gather(
+        lambda: get_page(request, post_list),
+        lambda: AuthorStats.for_user(author),
+        lambda: check_following and Follow.objects.filter(
             user=request_user,
             author=author
-        ).exists()
+        ).exists(),
+    )
+    count_of_posts = stats.posts
+    if check_following:
         context = {
             'author': author,
             'page': page,
+            'stats': stats,
             'count_of_posts': count_of_posts,
             'request_user': request_user,
             'following': following,
@@ -89,23 +121,38 @@ def profile(request, username):
         }
         return render(request, 'profile.html', context)
     context = {
-        'author': author, 'page': page,
+        'author': author, 'page': page, 'stats': stats,
         'count_of_posts': count_of_posts, 'request_user': request_user,
     }
     return render(request, 'profile.html', context)
 
 
+def comments_page(request, comment_list):
+    """Комментарии по курсору ?after= вместе с авторами одним запросом."""
+    page = get_page(
+        request, comment_list.select_related('author'),
+        ordering=COMMENT_ORDERING)
+    page.object_list = list(page.object_list)
+    return page
+
+
+@conditional_page(
+    lambda username, post_id: [(POST, post_id), (AUTHOR, username)])
+@throttle('comment')
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, pk=post_id)
-    comment_list = post.comments.all()
-    paginator = Paginator(comment_list, PAGE_SIZE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'),
+        author__username=username, pk=post_id)
     user = request.user
     user_profile = post.author
+    page, stats = concurrent.gather(
+        lambda: comments_page(request, post.comments.all()),
+        lambda: AuthorStats.for_user(user_profile),
+    )
     form = CommentForm(request.POST or None,)
     context = {
         'author': user_profile, 'post': post,
+        'stats': stats,
         'page': page, 'user': user, 'form': form
     }
     if form.is_valid():
@@ -119,7 +166,23 @@ def post_view(request, username, post_id):
     return render(request, 'post.html', context)
 
 
+@conditional_page(lambda username, post_id: [(POST, post_id)],
+                  per_viewer=False)
+def post_comments(request, username, post_id):
+    """Фрагмент со следующей порцией комментариев для «Показать ещё»."""
+    get_object_or_404(
+        Post.objects.only('pk'), author__username=username, pk=post_id)
+    comment_list = Comment.objects.filter(post_id=post_id)
+    context = {
+        'page': comments_page(request, comment_list),
+        'username': username,
+        'post_id': post_id,
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
 @login_required
+@throttle('comment')
 def post_comment(request, username, post_id):
     post = get_object_or_404(Post, author__username=username, pk=post_id)
     form = CommentForm(request.POST or None,)
@@ -135,10 +198,15 @@ def post_comment(request, username, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, PAGE_SIZE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    if 'page' in request.GET:
+        post_list = Post.objects.filter(
+            author__following__user=request.user
+        ).select_related('author', 'group')
+        page = get_page(request, post_list)
+    else:
+        page = timeline.feed_page(
+            request.user, PAGE_SIZE,
+            request.GET.get('after'), request.GET.get('before'))
     context = {
         'page': page,
     }
@@ -146,6 +214,7 @@ def follow_index(request):
 
 
 @login_required
+@throttle('follow', methods=('GET', 'POST'))
 def profile_follow(request, username):
     following = get_object_or_404(User, username=username)
     if request.user != following:
@@ -157,6 +226,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@throttle('follow', methods=('GET', 'POST'))
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     follow = get_object_or_404(Follow, user=request.user, author=author)
@@ -177,3 +247,29 @@ def page_not_found(request, exception):
 
 def server_error(request):
     return render(request, "misc/500.html", status=500)
+
+
+@staff_member_required
+def export_data(request):
+    kinds = request.GET.getlist('type') or list(export.SOURCES)
+    if not set(kinds) <= set(export.SOURCES):
+        return HttpResponseBadRequest('Неизвестный тип выгрузки')
+    try:
+        checkpoint = {
+            kind: int(request.GET[f'since_{kind}_id'])
+            for kind in export.SOURCES if f'since_{kind}_id' in request.GET
+        }
+        since = request.GET.get('since')
+        since = export.parse_since(since) if since else None
+    except ValueError:
+        return HttpResponseBadRequest('Неверные параметры выгрузки')
+    compress = request.GET.get('gzip') == '1'
+    lines = export.export_lines(kinds, checkpoint, since)
+    if compress:
+        content_type, filename = 'application/gzip', 'export.ndjson.gz'
+    else:
+        content_type, filename = 'application/x-ndjson', 'export.ndjson'
+    response = StreamingHttpResponse(
+        export.encode(lines, compress), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,51 @@
+"""
+Отправка почты через очередь задач.
+
+EMAIL_BACKEND = 'tasks.mail.QueuedEmailBackend' только ставит письмо
+в очередь, а воркер отправляет его через TASKS_EMAIL_BACKEND. Письма
+с вложениями отправляются сразу: вложения не переносятся в JSON.
+"""
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .queue import enqueue
+
+
+def serialize(message):
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+    }
+
+
+def deserialize(data):
+    data = dict(data)
+    alternatives = [tuple(item) for item in data.pop('alternatives')]
+    return EmailMultiAlternatives(alternatives=alternatives, **data)
+
+
+def delivery_connection(**kwargs):
+    return get_connection(settings.TASKS_EMAIL_BACKEND, **kwargs)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        sent = 0
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            if message.attachments:
+                sent += delivery_connection(
+                    fail_silently=self.fail_silently).send_messages([message])
+                continue
+            enqueue('tasks.send_email', serialize(message))
+            sent += 1
+        return sent
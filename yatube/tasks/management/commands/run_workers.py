@@ -0,0 +1,29 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import worker
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи из очереди в нескольких процессах.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=multiprocessing.cpu_count(),
+            help='Число процессов; при 1 задачи выполняются в этом же.')
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1,
+            help='Сколько задач захватывать за раз.')
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выйти, когда готовых задач не останется.')
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1 or options['batch_size'] < 1:
+            raise CommandError('Нужен хотя бы один процесс и одна задача.')
+        worker.run(options['processes'], options['poll'],
+                   options['batch_size'], options['burst'])
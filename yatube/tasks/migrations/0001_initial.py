@@ -0,0 +1,38 @@
+# Generated by Django 2.2.6 on 2026-10-18 03:09
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='задача')),
+                ('payload', models.TextField(default='{}', verbose_name='аргументы')),
+                ('priority', models.SmallIntegerField(default=0, verbose_name='приоритет')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('done', 'Выполнена'), ('failed', 'Ошибка')], default='queued', max_length=10, verbose_name='состояние')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='попытки')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name='предел попыток')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='не раньше')),
+                ('key', models.CharField(blank=True, max_length=200, null=True, unique=True, verbose_name='ключ идемпотентности')),
+                ('locked_by', models.CharField(blank=True, max_length=32)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, verbose_name='последняя ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='создана')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='завершена')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', '-priority', 'run_at'], name='task_ready_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """Отложенный вызов зарегистрированной функции (см. tasks.queue)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('задача', max_length=200)
+    payload = models.TextField('аргументы', default='{}')
+    priority = models.SmallIntegerField('приоритет', default=0)
+    status = models.CharField(
+        'состояние', max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField('попытки', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'предел попыток', default=5)
+    run_at = models.DateTimeField('не раньше', default=timezone.now)
+    key = models.CharField(
+        'ключ идемпотентности', max_length=200, unique=True,
+        null=True, blank=True)
+    locked_by = models.CharField(max_length=32, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField('последняя ошибка', blank=True)
+    created = models.DateTimeField('создана', auto_now_add=True)
+    finished = models.DateTimeField('завершена', null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_at'],
+                name='task_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,162 @@
+"""
+Очередь задач в базе.
+
+Функция регистрируется декоратором @register и ставится в очередь через
+enqueue(): в запросе это одна вставка строки, которая фиксируется
+вместе с транзакцией view, а выполняют задачу процессы run_workers.
+
+- Приоритет: сначала задачи с большим priority, затем по run_at.
+- Повторы: упавшая задача возвращается в очередь с экспоненциальной
+  задержкой, после max_attempts попыток остаётся в состоянии failed.
+- Идемпотентность: задача с ключом key ставится не больше одного
+  раза, пока её строка не удалена при очистке (TASK_KEEP_DONE).
+  Упавшая окончательно (failed) задача ключ не держит: новый
+  enqueue с тем же ключом ставит её заново.
+- Захват не требует SELECT ... FOR UPDATE: воркер переводит строки
+  в running одним UPDATE со своим токеном и выполняет только
+  доставшиеся ему. Задачи, зависшие в running дольше TASK_TIMEOUT
+  (воркер умер), возвращаются в очередь.
+"""
+import json
+import logging
+import random
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+HIGH = 10
+NORMAL = 0
+LOW = -10
+
+_registry = {}
+
+
+def register(name, max_attempts=None, priority=NORMAL):
+    """Регистрирует функцию как задачу name; аргументы — JSON."""
+    def decorator(function):
+        function.task_name = name
+        function.max_attempts = max_attempts or settings.TASK_MAX_ATTEMPTS
+        function.priority = priority
+        _registry[name] = function
+        return function
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f'Задача {name} не зарегистрирована') from None
+
+
+def enqueue(name, *args, priority=None, key=None, delay=0, **kwargs):
+    """
+    Ставит задачу name в очередь и возвращает её строку.
+
+    Если задача с ключом key уже есть, возвращается она; упавшая
+    окончательно задача при этом возвращается в очередь с новыми
+    аргументами и счётчиком попыток.
+    """
+    function = get_task(name)
+    fields = {
+        'name': name,
+        'payload': json.dumps({'args': args, 'kwargs': kwargs}),
+        'priority': function.priority if priority is None else priority,
+        'max_attempts': function.max_attempts,
+        'run_at': timezone.now() + timedelta(seconds=delay),
+    }
+    if key is None:
+        return Task.objects.create(**fields)
+    task, created = Task.objects.get_or_create(key=key, defaults=fields)
+    if not created and task.status == Task.FAILED:
+        Task.objects.filter(pk=task.pk, status=Task.FAILED).update(
+            status=Task.QUEUED, attempts=0, locked_by='', finished=None,
+            **fields)
+        task.refresh_from_db()
+    return task
+
+
+def claim(limit=1):
+    """Переводит до limit готовых задач в running и возвращает их."""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    ready = (
+        Task.objects.filter(status=Task.QUEUED, run_at__lte=now)
+        .order_by('-priority', 'run_at', 'pk').values('pk')[:limit])
+    # Один UPDATE с подзапросом: выборка и захват атомарны, и SQLite
+    # не приходится повышать блокировку чтения до записи.
+    claimed = Task.objects.filter(pk__in=ready, status=Task.QUEUED).update(
+        status=Task.RUNNING, locked_by=token, locked_at=now,
+        attempts=F('attempts') + 1)
+    if not claimed:
+        return []
+    return list(Task.objects.filter(locked_by=token, status=Task.RUNNING))
+
+
+def backoff(attempts):
+    """Задержка перед повтором: удваивается с каждой попыткой."""
+    delay = min(settings.TASK_RETRY_MAX_DELAY,
+                settings.TASK_RETRY_DELAY * 2 ** (attempts - 1))
+    # Разброс, чтобы задачи, упавшие вместе, не повторялись вместе.
+    return delay * random.uniform(0.8, 1.2)
+
+
+def execute(task):
+    """Выполняет захваченную задачу и записывает результат."""
+    now = timezone.now
+    owned = Task.objects.filter(pk=task.pk, locked_by=task.locked_by)
+    try:
+        payload = json.loads(task.payload)
+        get_task(task.name)(*payload['args'], **payload['kwargs'])
+    except Exception:
+        error = traceback.format_exc()
+        if task.attempts < task.max_attempts:
+            logger.warning('Задача %s упала, попытка %s из %s', task,
+                           task.attempts, task.max_attempts, exc_info=True)
+            owned.update(
+                status=Task.QUEUED, locked_by='', last_error=error,
+                run_at=now() + timedelta(seconds=backoff(task.attempts)))
+            return False
+        logger.error('Задача %s не выполнена', task, exc_info=True)
+        owned.update(status=Task.FAILED, last_error=error, finished=now())
+        return False
+    owned.update(status=Task.DONE, finished=now())
+    return True
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи умерших воркеров."""
+    deadline = timezone.now() - timedelta(seconds=settings.TASK_TIMEOUT)
+    stale = Task.objects.filter(status=Task.RUNNING, locked_at__lt=deadline)
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.FAILED, finished=timezone.now(),
+        last_error='Превышено время выполнения')
+    return stale.update(status=Task.QUEUED, locked_by='')
+
+
+def purge():
+    """Удаляет давно выполненные задачи вместе с их ключами."""
+    deadline = timezone.now() - timedelta(seconds=settings.TASK_KEEP_DONE)
+    return Task.objects.filter(
+        status=Task.DONE, finished__lt=deadline).delete()[0]
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи в текущем процессе, пока они есть."""
+    done = 0
+    while limit is None or done < limit:
+        tasks = claim()
+        if not tasks:
+            break
+        for task in tasks:
+            execute(task)
+            done += 1
+    return done
@@ -0,0 +1,7 @@
+from .mail import delivery_connection, deserialize
+from .queue import HIGH, register
+
+
+@register('tasks.send_email', priority=HIGH)
+def send_email(message):
+    delivery_connection().send_messages([deserialize(message)])
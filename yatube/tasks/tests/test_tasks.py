@@ -0,0 +1,118 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts.models import AuthorStats, Comment, Follow, Post, TimelineEntry
+from tasks import queue
+from tasks.models import Task
+
+User = get_user_model()
+
+calls = []
+
+
+@queue.register('tests.record')
+def record(value, suffix=''):
+    calls.append(f'{value}{suffix}')
+
+
+@queue.register('tests.fail', max_attempts=2)
+def fail():
+    raise RuntimeError('сбой')
+
+
+@override_settings(
+    EMAIL_BACKEND='tasks.mail.QueuedEmailBackend',
+    TASKS_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_priority_and_key(self):
+        '''Задачи идут по приоритету, ключ не даёт поставить задачу дважды'''
+        queue.enqueue('tests.record', 'low', priority=queue.LOW)
+        queue.enqueue('tests.record', 'high', priority=queue.HIGH)
+        first = queue.enqueue('tests.record', 'once', key='once', suffix='!')
+        second = queue.enqueue('tests.record', 'once', key='once')
+        self.assertEqual(first, second)
+        queue.enqueue('tests.record', 'later', delay=60)
+        self.assertEqual(queue.run_pending(), 3)
+        self.assertEqual(calls, ['high', 'once!', 'low'])
+        self.assertEqual(
+            Task.objects.filter(status=Task.QUEUED).count(), 1)
+
+    def test_retry_with_backoff(self):
+        '''Упавшая задача повторяется с задержкой, затем помечается ошибкой'''
+        task = queue.enqueue('tests.fail')
+        with self.assertLogs('tasks.queue', 'WARNING'):
+            queue.run_pending()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertEqual(task.attempts, 1)
+        self.assertGreater(task.run_at, timezone.now())
+        self.assertIn('RuntimeError', task.last_error)
+        Task.objects.filter(pk=task.pk).update(run_at=timezone.now())
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            queue.run_pending()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+
+    def test_failed_key_can_be_requeued(self):
+        '''Ключ окончательно упавшей задачи не блокирует новую постановку'''
+        task = queue.enqueue('tests.fail', key='retry-me')
+        Task.objects.filter(pk=task.pk).update(
+            status=Task.FAILED, attempts=2, finished=timezone.now())
+        again = queue.enqueue('tests.record', 'fixed', key='retry-me')
+        self.assertEqual(again.pk, task.pk)
+        self.assertEqual((again.status, again.attempts), (Task.QUEUED, 0))
+        queue.run_pending()
+        self.assertEqual(calls, ['fixed'])
+
+    def test_requeue_stale(self):
+        '''Задача умершего воркера возвращается в очередь'''
+        task = queue.enqueue('tests.record', 'stale')
+        queue.claim()
+        Task.objects.filter(pk=task.pk).update(
+            locked_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(queue.requeue_stale(), 1)
+        call_command('run_workers', processes=1, burst=True,
+                     stdout=StringIO())
+        self.assertEqual(calls, ['stale'])
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (Task.DONE, 2))
+
+    def test_queued_email(self):
+        '''Письмо уходит из воркера, а не из запроса'''
+        mail.send_mail('Тема', 'Текст', 'from@example.com', ['to@example.com'])
+        self.assertEqual(mail.outbox, [])
+        queue.run_pending()
+        self.assertEqual(mail.outbox[0].subject, 'Тема')
+        self.assertEqual(mail.outbox[0].to, ['to@example.com'])
+
+    def test_comment_notification(self):
+        '''Автор поста получает письмо о комментарии через очередь'''
+        author = User.objects.create(username='author', email='a@example.com')
+        reader = User.objects.create(username='reader')
+        post = Post.objects.create(text='Пост', author=author)
+        Comment.objects.create(text='Отличный пост', author=reader, post=post)
+        queue.run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Отличный пост', mail.outbox[0].body)
+
+    @override_settings(TIMELINE_INLINE_FANOUT=0)
+    def test_deferred_fan_out(self):
+        '''Раскладка поста популярного автора выполняется воркером'''
+        author = User.objects.create(username='author')
+        reader = User.objects.create(username='reader')
+        Follow.objects.create(user=reader, author=author)
+        self.assertEqual(AuthorStats.objects.get(pk=author.pk).followers, 1)
+        post = Post.objects.create(text='Пост', author=author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        queue.run_pending()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=reader, post=post).exists())
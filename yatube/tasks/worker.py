@@ -0,0 +1,107 @@
+"""
+Пул процессов, выполняющих задачи из очереди.
+
+Родитель только следит за детьми и перезапускает упавших. SIGTERM и
+SIGINT ставят флаг остановки: каждый воркер доделывает текущую задачу
+и выходит. Раз в HOUSEKEEPING_INTERVAL секунд воркер возвращает в
+очередь зависшие задачи и удаляет старые выполненные — это
+идемпотентно, поэтому не важно, какой из воркеров успеет первым.
+"""
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+
+from django.db import OperationalError, close_old_connections, connections
+
+from . import queue
+
+logger = logging.getLogger(__name__)
+
+HOUSEKEEPING_INTERVAL = 60
+
+
+def work(stop, poll=1.0, batch=1, burst=False):
+    """Цикл воркера; burst — выйти, когда готовых задач не осталось."""
+    housekeeping = 0
+    while not stop.is_set():
+        try:
+            if time.monotonic() - housekeeping > HOUSEKEEPING_INTERVAL:
+                queue.requeue_stale()
+                queue.purge()
+                housekeeping = time.monotonic()
+            tasks = queue.claim(batch)
+        except OperationalError:
+            # База занята другим писателем дольше busy_timeout.
+            logger.warning('Не удалось захватить задачи', exc_info=True)
+            stop.wait(poll)
+            continue
+        finally:
+            # Граница «запроса»: не держать соединение, закрытое базой.
+            close_old_connections()
+        for task in tasks:
+            queue.execute(task)
+        if not tasks:
+            if burst:
+                return
+            stop.wait(poll)
+
+
+def child(stop, poll, batch, burst):
+    # Ctrl+C получает вся группа процессов; останавливает родитель.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    try:
+        work(stop, poll, batch, burst)
+    finally:
+        connections.close_all()
+
+
+def stop_on_signals(stop):
+    """Ставит флаг stop по SIGINT/SIGTERM; возвращает прежние обработчики."""
+    return {
+        signum: signal.signal(signum, lambda *args: stop.set())
+        for signum in (signal.SIGINT, signal.SIGTERM)
+    }
+
+
+def restore_signals(handlers):
+    for signum, handler in handlers.items():
+        signal.signal(signum, handler)
+
+
+def run(processes, poll=1.0, batch=1, burst=False):
+    """Запускает воркеры; один воркер работает в текущем процессе."""
+    if processes == 1:
+        stop = threading.Event()
+        handlers = stop_on_signals(stop)
+        try:
+            work(stop, poll, batch, burst)
+        finally:
+            restore_signals(handlers)
+        return
+    stop = multiprocessing.Event()
+    handlers = stop_on_signals(stop)
+    # Соединения родителя не должны достаться детям.
+    connections.close_all()
+
+    def spawn():
+        process = multiprocessing.Process(
+            target=child, args=(stop, poll, batch, burst), daemon=True)
+        process.start()
+        return process
+
+    pool = [spawn() for _ in range(processes)]
+    while pool:
+        for process in list(pool):
+            if process.is_alive():
+                continue
+            pool.remove(process)
+            if process.exitcode != 0 and not stop.is_set():
+                logger.warning('Воркер %s завершился с кодом %s, '
+                               'запускаю новый', process.pid,
+                               process.exitcode)
+                pool.append(spawn())
+        stop.wait(1)
+    restore_signals(handlers)
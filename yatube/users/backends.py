@@ -0,0 +1,48 @@
+"""
+Пользователь сессии из кеша.
+
+AuthenticationMiddleware на каждом запросе вошедшего читает
+пользователя из auth_user. CachedModelBackend держит его в кеше под
+ключом с версией пользователя; любое сохранение или удаление
+пользователя меняет версию (см. users.signals). Версия, а не
+удаление записи, нужна из-за гонки: процесс, успевший прочитать
+из базы старые данные, запишет их под старой версией, которую уже
+никто не читает.
+
+Изменения через QuerySet.update() сигналов не посылают — после них
+нужно вызвать touch_user().
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def version_key(user_id):
+    return f'auth:user-version:{user_id}'
+
+
+def user_version(user_id):
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time(), None)
+        version = cache.get(key)
+    return version
+
+
+def touch_user(user_id):
+    cache.set(version_key(user_id), time.time(), None)
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = f'auth:user:{user_id}:{user_version(user_id)}'
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,88 @@
+"""
+Сессии в кеше с отложенной записью в базу.
+
+SESSION_ENGINE = 'users.sessions'. Как и cached_db, сессия читается
+из кеша, а из базы — только при промахе. Отличие в записи: новая
+сессия (вход, смена ключа) сразу вставляется в базу, чтобы ключ был
+уникальным, а изменения существующей попадают в кеш немедленно, в
+базу же — пачкой после ответа, когда самая старая несохранённая
+сессия ждёт дольше SESSION_WRITE_DELAY секунд. Несколько изменений
+одной сессии за это время дают одну запись.
+
+Несохранённые изменения живут в памяти процесса, поэтому воркерам
+нужен общий кеш (yatube.sharedcache): иначе другой процесс при
+промахе прочитает из базы прежнюю версию. Сессия, созданная в этом
+же запросе (вход), записывается сразу: без этого данные входа до
+записи были бы только в кеше. Изменения, не записанные к остановке
+процесса, остаются только в кеше.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+from django.core.signals import request_finished
+from django.db import router
+from django.utils import timezone
+
+KEY_PREFIX = 'users.sessions'
+
+_lock = threading.Lock()
+# session_key -> (экземпляр Session для записи, время первого изменения)
+_pending = {}
+
+
+def flush_pending(delay=0):
+    """Записывает отложенные сессии, если самая старая ждёт дольше delay."""
+    with _lock:
+        if not _pending:
+            return 0
+        oldest = min(since for _, since in _pending.values())
+        if time.monotonic() - oldest < delay:
+            return 0
+        instances = [instance for instance, _ in _pending.values()]
+        _pending.clear()
+    model = SessionStore.get_model_class()
+    model.objects.using(router.db_for_write(model)).bulk_update(
+        instances, ['session_data', 'expire_date'])
+    return len(instances)
+
+
+def request_flush(**kwargs):
+    flush_pending(settings.SESSION_WRITE_DELAY)
+
+
+request_finished.connect(request_flush, dispatch_uid='users.sessions')
+
+
+class SessionStore(cached_db.SessionStore):
+    cache_key_prefix = KEY_PREFIX
+    _created = False
+
+    def _get_session_from_db(self):
+        # После промаха кеша свежее базы может быть отложенная запись.
+        with _lock:
+            pending = _pending.get(self.session_key)
+        if pending is not None and pending[0].expire_date > timezone.now():
+            return pending[0]
+        return super()._get_session_from_db()
+
+    def save(self, must_create=False):
+        if must_create or self.session_key is None:
+            self._created = True
+        if self._created:
+            super().save(must_create)
+            return
+        data = self._get_session(no_load=must_create)
+        instance = self.create_model_instance(data)
+        self._cache.set(self.cache_key, data, self.get_expiry_age())
+        with _lock:
+            _, since = _pending.get(
+                instance.session_key, (None, time.monotonic()))
+            _pending[instance.session_key] = instance, since
+
+    def delete(self, session_key=None):
+        key = session_key if session_key is not None else self.session_key
+        with _lock:
+            _pending.pop(key, None)
+        super().delete(session_key)
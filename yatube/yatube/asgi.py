@@ -0,0 +1,20 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``, e.g. ``uvicorn yatube.asgi:application``. Django 2.2
+has no native ASGI support, so the WSGI handler is wrapped by
+yatube.asgi_handler and runs in a thread pool of ASGI_THREADS.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from yatube.asgi_handler import WsgiToAsgi
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = WsgiToAsgi(
+    get_wsgi_application(), threads=settings.ASGI_THREADS)
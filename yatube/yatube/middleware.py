@@ -0,0 +1,87 @@
+"""
+Замеры запросов: число SQL-запросов, время в БД, повторяющиеся
+запросы (признак N+1) и общее время обработки для каждого URL name.
+
+Результат отдаётся в заголовке Server-Timing и пишется одной строкой
+JSON в логгер yatube.performance. Запросы, которые posts.concurrent.gather
+выполняет в потоках пула, тоже учитываются. Для view из QUERY_BUDGETS при
+превышении бюджета запросов пишется предупреждение.
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from posts.concurrent import wrap_queries
+
+logger = logging.getLogger('yatube.performance')
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        # Запросы из gather приходят из потоков пула одновременно.
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            with self.lock:
+                self.duration += duration
+                self.count += 1
+                self.statements[sql] += 1
+
+    def duplicates(self):
+        return [
+            {'sql': sql[:200], 'count': count}
+            for sql, count in self.statements.most_common()
+            if count > 1
+        ]
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with wrap_queries(recorder):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match and match.url_name else 'unresolved'
+        duplicates = recorder.duplicates()
+        response['Server-Timing'] = (
+            f'db;dur={recorder.duration * 1000:.1f};'
+            f'desc="{recorder.count} queries", '
+            f'view;dur={elapsed * 1000:.1f};desc="{view}"'
+        )
+        logger.info(json.dumps({
+            'view': view,
+            'method': request.method,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(recorder.duration * 1000, 2),
+            'view_ms': round(elapsed * 1000, 2),
+            'duplicates': duplicates,
+        }, ensure_ascii=False))
+
+        budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        budget = budgets.get(
+            view, getattr(settings, 'QUERY_BUDGET_DEFAULT', None))
+        if budget is not None and recorder.count > budget:
+            logger.warning(
+                'Превышен бюджет запросов для %s: %d > %d, повторы: %s',
+                view, recorder.count, budget,
+                json.dumps(duplicates[:5], ensure_ascii=False))
+        return response
@@ -0,0 +1,87 @@
+"""
+Чтение с реплик и запись в основную базу.
+
+ReplicaMiddleware включает чтение с реплики только для GET/HEAD
+запросов к view из REPLICA_VIEWS. Если за время запроса что-то
+записывалось, пользователь получает cookie и следующие
+REPLICA_PIN_SECONDS секунд читает из основной базы, чтобы сразу
+увидеть свой пост или комментарий, даже если реплика отстаёт.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+PIN_COOKIE = 'pin_primary'
+
+_use_replica = ContextVar('use_replica', default=False)
+# Словарь на запрос, а не флаг: posts.concurrent.gather выполняет
+# функции в копии контекста, и set() внутри неё не виден middleware.
+_writes = ContextVar('writes', default=None)
+
+
+def reading_from_replica():
+    return bool(getattr(settings, 'DATABASE_REPLICAS', [])
+                and _use_replica.get())
+
+
+def may_lag(stamp):
+    """
+    Изменение со штампом stamp могло ещё не дойти до реплики.
+
+    Страницу, прочитанную с реплики в этом окне, нельзя кешировать
+    под новым штампом: иначе устаревшая версия останется до
+    следующего изменения.
+    """
+    return (reading_from_replica()
+            and time.time() - stamp < settings.REPLICA_PIN_SECONDS)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        writes = _writes.get()
+        if writes is not None:
+            writes['wrote'] = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writes = {'wrote': False}
+        token = _writes.set(writes)
+        try:
+            response = self.get_response(request)
+            if writes['wrote']:
+                response.set_cookie(
+                    PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True, samesite='Lax')
+        finally:
+            replica_token = getattr(request, '_replica_token', None)
+            if replica_token is not None:
+                _use_replica.reset(replica_token)
+            _writes.reset(token)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (request.method in ('GET', 'HEAD')
+                and request.resolver_match.view_name
+                in settings.REPLICA_VIEWS
+                and PIN_COOKIE not in request.COOKIES):
+            request._replica_token = _use_replica.set(True)
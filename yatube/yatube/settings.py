@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import sys
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -39,6 +40,9 @@ INSTALLED_APPS = [
     'about',
     'users',
     'posts',
+    'benchmarks',
+    'api',
+    'tasks',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -49,6 +53,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.middleware.RequestMetricsMiddleware',
+    'yatube.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -83,13 +89,64 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Профили SQLite (см. yatube.sqlite3). Производственный включается
+# переменной окружения YATUBE_DB_PROFILE=production: WAL не даёт
+# пишущим запросам блокировать читающие, а соединения живут между
+# запросами.
+SQLITE_PROFILES = {
+    'development': {
+        'PRAGMAS': {'journal_mode': 'DELETE'},
+        'CONN_MAX_AGE': 0,
+    },
+    'production': {
+        'PRAGMAS': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -64000,
+            'mmap_size': 268435456,
+            'busy_timeout': 5000,
+            'temp_store': 'MEMORY',
+        },
+        'TRANSACTION_MODE': 'IMMEDIATE',
+        'CONN_MAX_AGE': 600,
+    },
+}
+
+DB_PROFILE = os.environ.get('YATUBE_DB_PROFILE', 'development')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        **SQLITE_PROFILES[DB_PROFILE],
+    }
+}
+
+# Реплики для чтения (см. yatube.replicas). Локально реплика — второй
+# файл SQLite: YATUBE_REPLICA=1 и manage.py sync_replica для копирования.
+# Тесты запускаются без реплик: TestCase разрешает запросы только к default.
+DATABASE_REPLICAS = []
+
+if os.environ.get('YATUBE_REPLICA'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.path.join(BASE_DIR, 'replica.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS = ['replica']
+
+DATABASE_ROUTERS = ['yatube.replicas.ReplicaRouter']
+
+# View, которые читают с реплики при GET-запросе.
+REPLICA_VIEWS = {
+    'index', 'group', 'profile', 'follow_index', 'post', 'post_comments',
+    'trending',
+    'api:index', 'api:group', 'api:profile', 'api:follow_index', 'api:post',
 }
 
+# Сколько секунд после записи пользователь читает из основной базы.
+REPLICA_PIN_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -135,14 +192,179 @@ LOGIN_URL = "/auth/login/"
 
 LOGIN_REDIRECT_URL = "index"
 
-EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
+# Письма ставятся в очередь задач, а run_workers отправляет их через
+# TASKS_EMAIL_BACKEND.
+EMAIL_BACKEND = "tasks.mail.QueuedEmailBackend"
+
+TASKS_EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
-CACHES = {
-    'default': {
+# Кеш: local — LocMemCache внутри процесса (разработка и тесты),
+# shared — файл SQLite, общий для всех воркеров (yatube.sharedcache).
+# Производственный профиль базы по умолчанию включает shared.
+CACHE_PROFILES = {
+    'local': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'shared': {
+        'BACKEND': 'yatube.sharedcache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'MAX_SIZE': 256 * 2 ** 20,
+        },
+    },
+}
+
+CACHES = {
+    'default': CACHE_PROFILES[os.environ.get(
+        'YATUBE_CACHE', 'shared' if DB_PROFILE == 'production' else 'local')],
 }
 
+# Сессии и пользователь запроса: db — сессии в базе, как в Django
+# по умолчанию; cached — сессии в кеше с отложенной записью в базу
+# (users.sessions) и пользователь из кеша (users.backends), так что
+# запрос вошедшего не обращается к базе за авторизацией.
+# ModelBackend оставлен вторым, чтобы старые сессии оставались
+# действительными.
+AUTH_PROFILES = {
+    'db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': [
+            'django.contrib.auth.backends.ModelBackend',
+        ],
+    },
+    'cached': {
+        'SESSION_ENGINE': 'users.sessions',
+        'AUTHENTICATION_BACKENDS': [
+            'users.backends.CachedModelBackend',
+            'django.contrib.auth.backends.ModelBackend',
+        ],
+    },
+}
+
+# Отложенная запись сессий держит изменения в памяти процесса, а с
+# LocMemCache у каждого воркера свой кеш: по умолчанию cached включается
+# только с общим кешем.
+AUTH_PROFILE = os.environ.get('YATUBE_AUTH', 'db' if CACHES['default'][
+    'BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache'
+    else 'cached')
+
+SESSION_ENGINE = AUTH_PROFILES[AUTH_PROFILE]['SESSION_ENGINE']
+
+AUTHENTICATION_BACKENDS = AUTH_PROFILES[AUTH_PROFILE][
+    'AUTHENTICATION_BACKENDS']
+
+# Через сколько секунд изменения сессии записываются в базу.
+SESSION_WRITE_DELAY = 5
+
+AUTH_USER_CACHE_TIMEOUT = 3600
+
 PAGE_SIZE = 10
+
+# Лента подписок: авторы с большим числом подписчиков читаются напрямую,
+# а не раскладываются по лентам при публикации.
+TIMELINE_FANOUT_LIMIT = 1000
+
+# Посты авторов, у которых подписчиков больше, раскладываются по лентам
+# задачей в очереди, а не в запросе.
+TIMELINE_INLINE_FANOUT = 100
+
+TIMELINE_BACKFILL = 200
+
+SEARCH_BACKEND = 'posts.search.SQLiteFTSBackend'
+
+# Миниатюры создаются задачей в очереди после сохранения поста,
+# шаблоны только читают готовые.
+THUMBNAIL_BACKEND = 'posts.thumbnails.DeferredThumbnailBackend'
+
+# Ширины адаптивных вариантов изображений постов (srcset).
+IMAGE_VARIANT_WIDTHS = (320, 640, 960)
+
+# Корзины токенов для записи (см. posts.throttle): '10/m' — до 10
+# запросов подряд и 10 новых токенов в минуту. Корзина IP общая для
+# всех пользователей за одним адресом, поэтому шире.
+THROTTLE_RATES = {
+    'post': {'user': '10/h', 'ip': '30/h'},
+    'comment': {'user': '10/m', 'ip': '30/m'},
+    'follow': {'user': '30/m', 'ip': '90/m'},
+}
+
+THROTTLE_KEY_TIMEOUT = 24 * 3600
+
+# Бюджеты SQL-запросов по URL name (см. yatube.middleware).
+QUERY_BUDGETS = {
+    'index': 8,
+    'group': 8,
+    'profile': 8,
+    'post': 10,
+    'post_comments': 2,
+    'follow_index': 8,
+    'search': 8,
+    'trending': 3,
+}
+
+QUERY_BUDGET_DEFAULT = None
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        # Строка замеров нужна и в продакшене, поэтому без фильтра DEBUG;
+        # в прогоне тестов выводятся только превышения бюджета запросов.
+        'performance': {
+            'level': os.environ.get(
+                'YATUBE_PERFORMANCE_LOG',
+                'WARNING' if sys.argv[1:2] == ['test'] else 'INFO'),
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yatube.performance': {
+            'handlers': ['performance'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Потоки пула ASGI-обёртки (см. yatube/asgi.py).
+ASGI_THREADS = 16
+
+# Потоки для параллельных независимых запросов внутри view
+# (posts.concurrent); 0 — выполнять запросы по очереди.
+CONCURRENT_QUERY_WORKERS = 4
+
+# Очередь задач (см. tasks.queue, manage.py run_workers).
+TASK_MAX_ATTEMPTS = 5
+
+# Задержка перед повтором в секундах: 10, 20, 40... но не больше часа.
+TASK_RETRY_DELAY = 10
+
+TASK_RETRY_MAX_DELAY = 3600
+
+# Задача в running дольше этого срока считается брошенной.
+TASK_TIMEOUT = 600
+
+# Сколько секунд хранить выполненные задачи и их ключи.
+TASK_KEEP_DONE = 7 * 24 * 3600
+
+# Прогрев кеша страниц воркерами имеет смысл только с общим кешем:
+# LocMemCache у каждого процесса свой.
+CACHE_WARMING = CACHES['default']['BACKEND'] != (
+    'django.core.cache.backends.locmem.LocMemCache')
+
+CACHE_WARM_HOST = 'localhost'
+
+# «Популярное» (см. posts.trending): вклад события в рейтинг вдвое
+# меньше через TRENDING_HALF_LIFE секунд.
+TRENDING_HALF_LIFE = 6 * 3600
+
+TRENDING_WEIGHTS = {'post': 3, 'comment': 1}
+
+# Затухший ниже этого рейтинг удаляется из таблиц.
+TRENDING_MIN_SCORE = 0.01
+
+# Пересчёт ставится в очередь не чаще раза в столько секунд.
+TRENDING_INTERVAL = 300
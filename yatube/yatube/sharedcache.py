@@ -0,0 +1,229 @@
+"""
+Кеш в файле SQLite, общий для всех процессов на одной машине.
+
+LocMemCache живёт внутри процесса: у каждого воркера gunicorn свой
+холодный кеш, а сброс штампа в одном воркере не виден другим. Здесь
+записи лежат в одном файле в режиме WAL, поэтому их видят все
+процессы, а читатели не ждут писателей.
+
+Вытеснение — приближённый LRU: время обращения обновляется не чаще
+раза в LRU_RESOLUTION секунд, чтобы чтение почти не писало в файл.
+Число записей и их общий размер ведут триггеры в таблице stats;
+при превышении MAX_ENTRIES или MAX_SIZE сначала удаляются истёкшие
+записи, затем давно не читанные (при CULL_FREQUENCY = 0 — все,
+кроме только что записанной). Целые числа хранятся как INTEGER,
+поэтому incr атомарен между процессами.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'yatube.sharedcache.SQLiteCache',
+            'LOCATION': '/var/tmp/yatube-cache.sqlite3',
+            'OPTIONS': {'MAX_ENTRIES': 100000, 'MAX_SIZE': 256 * 2 ** 20},
+        }
+    }
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+LRU_RESOLUTION = 1.0
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB,
+    expires REAL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE TABLE IF NOT EXISTS stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats VALUES (1, 0, 0);
+CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN
+    UPDATE stats SET entries = entries + 1, bytes = bytes + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN
+    UPDATE stats SET entries = entries - 1, bytes = bytes - old.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_resize AFTER UPDATE OF size ON cache
+BEGIN
+    UPDATE stats SET bytes = bytes + new.size - old.size;
+END;
+'''
+
+UPSERT = '''
+INSERT INTO cache (key, value, expires, accessed, size)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    value = excluded.value, expires = excluded.expires,
+    accessed = excluded.accessed, size = excluded.size
+'''
+
+
+def encode(value):
+    # bool — подкласс int, но должен вернуться как bool.
+    if type(value) is int:
+        return value
+    return sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+def decode(value):
+    if isinstance(value, int):
+        return value
+    return pickle.loads(value)
+
+
+def size_of(value):
+    return len(value) if isinstance(value, (bytes, memoryview)) else 8
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        options = params.get('OPTIONS', {})
+        self.max_size = options.get('MAX_SIZE', 64 * 2 ** 20)
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        # Соединение своё у каждого потока и процесса: после fork
+        # унаследованное соединение использовать нельзя.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None,
+                check_same_thread=False)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _write(self, statements):
+        """Выполняет statements(connection) в транзакции BEGIN IMMEDIATE."""
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            result = statements(connection)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return result
+
+    def _live(self, connection, key, now):
+        return connection.execute(
+            'SELECT value, accessed FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)', (key, now)).fetchone()
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        row = self._live(self.connection, key, now)
+        if row is None:
+            return default
+        value, accessed = row
+        if now - accessed > LRU_RESOLUTION:
+            self.connection.execute(
+                'UPDATE cache SET accessed = ? WHERE key = ?', (now, key))
+        return decode(value)
+
+    def _store(self, key, value, timeout, only_new):
+        value = encode(value)
+        expires = self.get_backend_timeout(timeout)
+
+        def statements(connection):
+            now = time.time()
+            if only_new and self._live(connection, key, now) is not None:
+                return False
+            connection.execute(
+                UPSERT, (key, value, expires, now, size_of(value)))
+            self._cull(connection, now, key)
+            return True
+
+        return self._write(statements)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store(self._key(key, version), value, timeout, only_new=False)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._store(
+            self._key(key, version), value, timeout, only_new=True)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expires = self.get_backend_timeout(timeout)
+        cursor = self.connection.execute(
+            'UPDATE cache SET expires = ?, accessed = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (expires, time.time(), key, time.time()))
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+
+        def statements(connection):
+            row = self._live(connection, key, time.time())
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = decode(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ?, size = ? WHERE key = ?',
+                (encode(value), size_of(encode(value)), key))
+            return value
+
+        return self._write(statements)
+
+    def delete(self, key, version=None):
+        self.connection.execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),))
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return self._live(self.connection, key, time.time()) is not None
+
+    def clear(self):
+        self.connection.execute('DELETE FROM cache')
+
+    def _cull(self, connection, now, keep):
+        entries, size = connection.execute(
+            'SELECT entries, bytes FROM stats').fetchone()
+        if entries <= self._max_entries and size <= self.max_size:
+            return
+        connection.execute(
+            'DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?',
+            (now,))
+        if not self._cull_frequency:
+            # CULL_FREQUENCY = 0: как в Django, очищается весь кеш,
+            # кроме только что записанного значения.
+            connection.execute('DELETE FROM cache WHERE key != ?', (keep,))
+            return
+        batch = max(1, self._max_entries // self._cull_frequency)
+        while True:
+            entries, size = connection.execute(
+                'SELECT entries, bytes FROM stats').fetchone()
+            if entries <= self._max_entries and size <= self.max_size:
+                return
+            connection.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY accessed LIMIT ?)', (batch,))
+
+    def close(self, **kwargs):
+        # Соединение остаётся открытым между запросами: открытие файла
+        # и чтение схемы на каждый запрос дороже самой работы с кешем.
+        pass
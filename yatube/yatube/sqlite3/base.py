@@ -0,0 +1,23 @@
+"""
+SQLite с настройкой соединений из DATABASES.
+
+PRAGMAS — словарь PRAGMA, которые выполняются на каждом новом
+соединении (journal_mode, synchronous, cache_size, mmap_size,
+busy_timeout...). TRANSACTION_MODE задаёт вид BEGIN для atomic():
+при IMMEDIATE пишущая транзакция сразу берёт блокировку записи и
+ждёт busy_timeout, а не падает с «database is locked» при попытке
+повысить блокировку посреди транзакции.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict.get('PRAGMAS', {}).items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict.get('TRANSACTION_MODE')
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
@@ -11,6 +11,7 @@ urlpatterns = [
     path("auth/", include("users.urls")),
     path("auth/", include("django.contrib.auth.urls")),
     path("admin/", admin.site.urls),
+    path("api/", include("api.urls")),
     path("", include("posts.urls")),
     path("about/", include("about.urls", namespace="about"))
 ]